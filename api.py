@@ -0,0 +1,213 @@
+"""실거래가 집계 조회 API(ASGI)
+
+    uvicorn api:app --workers 4
+
+    GET /aggregates?value=면적당금액&stats=mean,median&by=계약년월&지역코드=11680&면적대=60~85
+    GET /aggregates?...&format=arrow    # Arrow IPC stream(Accept: application/vnd.apache.arrow.stream도 가능)
+    GET /regions                        # 시군구별 평균가
+    GET /boundaries?zoom=11             # 줌에 맞게 단순화한 경계(GeoJSON)
+    GET /metrics                        # Prometheus 텍스트
+
+미리 계산한 집계 큐브와 단순화 경계만 읽으므로 geopandas를 불러오지 않는다.
+응답은 ETag(내용 해시)와 함께 캐시되고, If-None-Match가 같으면 304, gzip을 받으면 압축해 보낸다.
+"""
+import asyncio
+from collections import OrderedDict
+import gzip
+import hashlib
+import io
+import json
+import threading
+from urllib.parse import parse_qs
+
+import pandas as pd
+import pyarrow as pa
+
+from utils.cube import CUBE_DIMS, CUBE_STATS, CUBE_VALUES, OUT_CUBE, TradeCube
+from utils.config import OUT_DIR
+from utils.geometry import SIMPLIFY_LEVELS, level_for_zoom, level_path, read_frame, snapshot_path
+from utils.metrics import METRICS
+
+MERGE_GEOJSON = OUT_DIR / "merge.geojson"
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+CACHE_CONTROL = "public, max-age=300"
+MIN_GZIP_BYTES = 1024    # 이보다 작은 응답은 압축하지 않음
+
+
+class Response:
+    """캐시할 응답(본문, gzip 본문, 본문별 ETag)"""
+
+    def __init__(self, body: bytes, content_type: str, status: int = 200) -> None:
+        self.body = body
+        self.content_type = content_type
+        self.status = status
+        self.etag = f'"{hashlib.sha1(body).hexdigest()[:20]}"'
+        self.gzip_etag = f'{self.etag[:-1]}-gz"'    # 강한 ETag는 표현(인코딩)마다 달라야 함
+        self._gzipped: bytes = None
+
+    @property
+    def gzipped(self) -> bytes:
+        if self._gzipped is None:
+            self._gzipped = gzip.compress(self.body, compresslevel=6, mtime=0)
+        return self._gzipped
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match(쉼표로 구분한 목록 또는 "*")에 `etag`가 있는지(약한 비교)"""
+    tags = [tag.strip() for tag in if_none_match.split(",") if tag.strip()]
+    return "*" in tags or etag in (tag.removeprefix("W/") for tag in tags)
+
+
+def _json(data, status: int = 200) -> Response:
+    return Response(json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode(), "application/json; charset=utf-8", status)
+
+
+def _table(df: pd.DataFrame, fmt: str) -> Response:
+    df = df.reset_index()
+    if fmt == "arrow":
+        sink = io.BytesIO()
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return Response(sink.getvalue(), ARROW_STREAM)
+    return Response(df.to_json(orient="records", force_ascii=False).encode(), "application/json; charset=utf-8")
+
+
+class QueryService:
+    """ASGI 앱
+
+    Args:
+        cube_dir (Path, optional): 집계 큐브 위치. Defaults to OUT_CUBE.
+        geojson_path (Path, optional): 시군구 경계·평균가(해상도별 파일은 옆에). Defaults to MERGE_GEOJSON.
+        cache_size (int, optional): 캐시할 응답 수. Defaults to 1024.
+    """
+
+    def __init__(self, cube_dir=OUT_CUBE, geojson_path=MERGE_GEOJSON, cache_size: int = 1024) -> None:
+        self.cube_dir = cube_dir
+        self.geojson_path = geojson_path
+        self.cache_size = cache_size
+        self._cache: OrderedDict[tuple, Response] = OrderedDict()
+        self._cube: tuple[int, TradeCube] = (None, None)
+        self._lock = threading.Lock()
+
+    def _version(self, path) -> int:
+        """파일·디렉터리가 바뀌면 달라지는 값(큐브는 파일을 교체하므로 디렉터리 수정 시각)"""
+        try:
+            return path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return 0
+
+    def cube(self) -> TradeCube:
+        version = self._version(self.cube_dir)
+        if self._cube[0] != version:
+            self._cube = (version, TradeCube(self.cube_dir))    # 다시 만들면 새 큐브를 읽음
+        return self._cube[1]
+
+    #####################################################################################
+    # 조회
+    def aggregates(self, query: dict[str, str], fmt: str) -> Response:
+        value = query.get("value", "면적당금액")
+        stats = query.get("stats", "median").split(",")
+        by = [dim for dim in query.get("by", "").split(",") if dim]
+        filters = {dim: query[dim] for dim in CUBE_DIMS if dim in query}
+        if value not in CUBE_VALUES:
+            raise ValueError(f"invalid value, got {value!r}")
+        unknown = set(stats) - set(CUBE_STATS)
+        if unknown:
+            raise ValueError(f"invalid stats, got {sorted(unknown)!r}")
+        return _table(self.cube().query(value, stats, by=by, **filters), fmt)
+
+    def regions(self, query: dict[str, str], fmt: str) -> Response:
+        return _table(read_frame(self.geojson_path).set_index("sido_sgg"), fmt)
+
+    def boundaries(self, query: dict[str, str], fmt: str) -> Response:
+        zoom = float(query.get("zoom", max(SIMPLIFY_LEVELS)))
+        path = level_path(self.geojson_path, level_for_zoom(zoom))
+        if not path.exists():
+            path = self.geojson_path
+        return Response(path.read_bytes(), "application/geo+json")
+
+    ROUTES = {"/aggregates": "aggregates", "/regions": "regions", "/boundaries": "boundaries"}
+
+    def _versions(self, route: str, query: dict) -> tuple:
+        if route == "aggregates":
+            return (self._version(self.cube_dir),)
+        if route == "boundaries":
+            level = level_for_zoom(float(query.get("zoom", max(SIMPLIFY_LEVELS))))
+            return (self._version(self.geojson_path), self._version(level_path(self.geojson_path, level)))
+        return (self._version(self.geojson_path), self._version(snapshot_path(self.geojson_path)))
+
+    def respond(self, path: str, query_string: str, accept: str) -> Response:
+        """요청 -> 응답(같은 요청·같은 데이터면 캐시에서)"""
+        if path == "/metrics":
+            return Response(METRICS.prometheus().encode(), "text/plain; version=0.0.4")
+        if path == "/health":
+            return _json({"status": "ok"})
+        route = self.ROUTES.get(path)
+        if route is None:
+            return _json({"error": f"not found: {path}"}, 404)
+
+        query = {key: values[-1] for key, values in parse_qs(query_string, keep_blank_values=True).items()}
+        fmt = query.pop("format", "arrow" if ARROW_STREAM in accept else "json")
+        try:
+            key = (route, fmt, tuple(sorted(query.items())), self._versions(route, query))
+        except ValueError as e:
+            return _json({"error": f"{e}"}, 400)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                METRICS.inc("api_cache_total", route=route, result="hit")
+                return cached
+
+        METRICS.inc("api_cache_total", route=route, result="miss")
+        try:
+            with METRICS.span("api_query", route=route):
+                response = getattr(self, route)(query, fmt)
+        except (ValueError, KeyError) as e:
+            return _json({"error": f"{e}"}, 400)
+        with self._lock:
+            self._cache[key] = response
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return response
+
+    #####################################################################################
+    # ASGI
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        if scope["type"] != "http":
+            return
+
+        headers = {name.decode("latin-1").lower(): value.decode("latin-1") for name, value in scope["headers"]}
+        if scope["method"] not in ("GET", "HEAD"):
+            response = _json({"error": "method not allowed"}, 405)
+        else:
+            # 캐시에 없으면 파일 읽기·집계·직렬화에 시간이 걸리므로 이벤트 루프를 막지 않도록 스레드에서
+            response = await asyncio.to_thread(self.respond, scope["path"], scope["query_string"].decode(), headers.get("accept", ""))
+
+        status, body = response.status, response.body
+        extra = []
+        if status == 200:
+            use_gzip = "gzip" in headers.get("accept-encoding", "") and len(body) >= MIN_GZIP_BYTES
+            etag = response.gzip_etag if use_gzip else response.etag
+            extra = [(b"etag", etag.encode()), (b"cache-control", CACHE_CONTROL.encode()), (b"vary", b"Accept, Accept-Encoding")]
+            if _etag_matches(headers.get("if-none-match", ""), etag):
+                status, body = 304, b""
+            elif use_gzip:
+                body = await asyncio.to_thread(getattr, response, "gzipped")    # 처음 한 번은 압축하므로 스레드에서
+                extra.append((b"content-encoding", b"gzip"))
+        if status != 304:
+            extra += [(b"content-type", response.content_type.encode()), (b"content-length", f"{len(body)}".encode())]
+        await send({"type": "http.response.start", "status": status, "headers": extra})
+        await send({"type": "http.response.body", "body": b"" if scope["method"] == "HEAD" else body})
+
+
+app = QueryService()
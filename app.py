@@ -1,45 +1,141 @@
-import streamlit as st
-import geopandas as gpd
-import plotly.express as px
+import hashlib
+import json
+import math
 from pathlib import Path
 
-from utils.data_utils import OUT_DIR
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+from utils.config import OUT_DIR
+from utils.geometry import SIMPLIFY_LEVELS, level_for_zoom, level_path, read_frame, snapshot_path
 
 # 데이터 경로 설정
 geojson_path = OUT_DIR / "merge.geojson"
+dong_dir = OUT_DIR / "merge_dong"    # 시군구별 읍면동 경계({sido_sgg}.geojson)
+STATIC_DIR = Path(__file__).parent / "static"    # .streamlit/config.toml의 enableStaticServing으로 제공
+
+
+@st.cache_data(show_spinner=False)
+def load_values(path: str, mtime_ns: int) -> pd.DataFrame:
+    """지역별 값(GeoParquet 스냅샷이 있으면 도형 없이 그 열만 읽음, 파일이 바뀌면 다시 읽음)"""
+    return read_frame(path)
+
+
+@st.cache_data(show_spinner=False)
+def boundary_url(path: str, mtime_ns: int) -> str:
+    """경계 GeoJSON을 내용 해시가 붙은 정적 파일로 두고 그 URL을 반환
+
+    경계는 브라우저에 한 번만 내려가 캐시되고, 슬라이더를 움직일 때는 지역명과 값만 다시 전송된다.
+    정적 파일이 이미 있으면 GeoJSON을 해석하지 않는다. 같은 원본(해상도)의 이전 해시 파일은 지운다.
+    """
+    raw = Path(path).read_bytes()
+    digest = hashlib.sha1(raw).hexdigest()[:12]
+    stem = Path(path).stem    # 해상도별 원본마다 따로("merge", "merge_z11", ...)
+    static_path = STATIC_DIR / f"{stem}_{digest}.geojson"
+    if not static_path.exists():
+        features = json.loads(raw)["features"]
+        geometry = {
+            "type": "FeatureCollection",
+            "features": [
+                {"type": "Feature", "id": feature["properties"]["adm_nm"], "properties": {}, "geometry": feature["geometry"]}
+                for feature in features
+            ],
+        }
+        STATIC_DIR.mkdir(exist_ok=True)
+        tmp = static_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(geometry, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+        tmp.replace(static_path)
+        for stale in STATIC_DIR.glob(f"{stem}_{'?' * len(digest)}.geojson"):    # 해시 길이가 같아 다른 해상도 파일은 제외
+            if stale != static_path:
+                stale.unlink(missing_ok=True)
+    return f"app/static/{static_path.name}"
+
+
+def load_map(path: Path, values_path: Path = None) -> tuple[pd.DataFrame, str]:
+    """지역별 값과 경계 파일 URL(값은 `values_path`에서, 없으면 경계 파일에서)"""
+    values_path = values_path or path
+    snapshot = snapshot_path(values_path)
+    mtime_ns = max(values_path.stat().st_mtime_ns, snapshot.stat().st_mtime_ns if snapshot.exists() else 0)    # 둘 중 하나만 바뀌어도 다시 읽음
+    return load_values(str(values_path), mtime_ns), boundary_url(str(path), path.stat().st_mtime_ns)
+
+
+@st.cache_data(show_spinner=False)
+def load_center(path: str, mtime_ns: int) -> dict:
+    """GeoJSON 전체 범위의 중심"""
+    lons, lats = [], []
+
+    def _walk(coords):
+        if isinstance(coords[0], (int, float)):
+            lons.append(coords[0])
+            lats.append(coords[1])
+        else:
+            for coord in coords:
+                _walk(coord)
+
+    for feature in json.loads(Path(path).read_bytes())["features"]:
+        _walk(feature["geometry"]["coordinates"])
+    return {"lat": (min(lats) + max(lats)) / 2, "lon": (min(lons) + max(lons)) / 2}
 
-# 데이터 읽기
-gdf: gpd.GeoDataFrame = gpd.read_file(geojson_path, encoding="utf-8")
 
 # Streamlit 앱 제목
 st.title("서울시 단위 면적당 평균 아파트 매매 실거래가")
 
+# 확대 수준에 맞는 해상도의 경계 선택(없으면 원본)
+zoom = st.sidebar.select_slider("지도 확대 수준", options=list(range(9, max(SIMPLIFY_LEVELS) + 1)), value=10)
+level_geojson_path = level_path(geojson_path, level_for_zoom(zoom))
+if not level_geojson_path.exists():
+    level_geojson_path = geojson_path
+
+# 데이터 읽기
+df, geojson_url = load_map(level_geojson_path, geojson_path)    # 해상도마다 속성은 같으므로 값은 원본의 스냅샷에서
+center = {"lat": 37.5665, "lon": 126.9780}
+
+# 읍면동 보기: 지도에서 구를 클릭하거나 사이드바에서 선택하면 그 구의 읍면동 경계만 불러옴
+sgg_options = ["전체"] + [
+    adm_nm for adm_nm, sido_sgg in zip(df["adm_nm"], df.get("sido_sgg", []))
+    if (dong_dir / f"{sido_sgg}.geojson").exists()
+]
+selection = st.session_state.get("city_map", {}).get("selection", {})
+clicked = [point.get("location") for point in selection.get("points", [])]
+if clicked and clicked[0] in sgg_options:
+    st.session_state["sgg"] = clicked[0]
+sgg = st.sidebar.selectbox("읍면동 보기", sgg_options, key="sgg")
+
+if sgg != "전체":
+    sido_sgg = df.loc[df["adm_nm"] == sgg, "sido_sgg"].iloc[0]
+    dong_path = dong_dir / f"{sido_sgg}.geojson"
+    df, geojson_url = load_map(dong_path)
+    center = load_center(str(dong_path), dong_path.stat().st_mtime_ns)
+    zoom = max(zoom, 12)
+    df = df.dropna(subset=["avg_price"])
+
 # 색상 범위 설정
-min_price = gdf["avg_price"].min()
-max_price = gdf["avg_price"].max()
+min_price = df["avg_price"].min()
+max_price = df["avg_price"].max()
 
 # 가격 범위 슬라이더
 price_range = st.slider(
     "가격 범위 선택 (단위: 만원)",
-    min_value=int(min_price),
-    max_value=int(max_price),
-    value=(int(min_price), int(max_price))
+    min_value=math.floor(min_price),
+    max_value=math.ceil(max_price),    # 내림하면 가장 비싼 지역이 빠짐
+    value=(math.floor(min_price), math.ceil(max_price))
 )
 
 # 범위 필터 적용
-filtered_gdf = gdf[(gdf["avg_price"] >= price_range[0]) & (gdf["avg_price"] <= price_range[1])]
+filtered_df = df[(df["avg_price"] >= price_range[0]) & (df["avg_price"] <= price_range[1])]
 
 # hover_data에 맞게 필드 지정
 fig = px.choropleth_mapbox(
-    filtered_gdf,
-    geojson=filtered_gdf.geometry.__geo_interface__,
-    locations=filtered_gdf.index,
+    filtered_df,
+    geojson=geojson_url,    # 경계는 URL로만 전달
+    locations="adm_nm",
     color="avg_price",
     color_continuous_scale="OrRd",
     range_color=(min_price, max_price),
     mapbox_style="carto-positron",
-    zoom=10,
-    center={"lat": 37.5665, "lon": 126.9780},
+    zoom=zoom,
+    center=center,
     opacity=0.7,
     labels={
         "avg_price": "평균가(만원)",
@@ -51,4 +147,4 @@ fig = px.choropleth_mapbox(
     }
 )
 
-st.plotly_chart(fig, use_container_width=True)
\ No newline at end of file
+st.plotly_chart(fig, use_container_width=True, on_select="rerun", selection_mode="points", key="city_map" if sgg == "전체" else "dong_map")
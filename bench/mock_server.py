@@ -0,0 +1,204 @@
+"""data.go.kr·SGIS API 로컬 대체 서버(벤치마크용, 네트워크 없이 실행)
+
+    python -m bench.mock_server --port 8000 --scale 10    # 단독 실행
+    python -m bench.mock_server --record                  # output/cache의 응답을 bench/fixtures로 복사
+
+실거래가 응답은 `fixtures/`에 녹화된 페이지(ResponseCache와 같은 배치)가 있으면 그대로 재생하고,
+없으면 저장된 실거래가 파티션의 거래를 `scale`배로 늘려 실제 응답 형식으로 만든다.
+법정동 코드·경계·좌표 응답은 output의 region_code.csv, geo_data.geojson으로 만든다.
+"""
+import argparse
+from functools import lru_cache
+import hashlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+from pathlib import Path
+import shutil
+import threading
+import time
+from urllib.parse import parse_qs, urlparse
+from xml.sax.saxutils import escape
+
+import pandas as pd
+
+from utils.data_load import OUT2, OUT4, apt_trade_files, apt_trade_partition, read_apt_trade
+from utils.config import CACHE_DIR
+
+FIXTURES = Path(__file__).parent / "fixtures"
+TRADE_ENDPOINT = "getRTMSDataSvcAptTrade"
+
+
+def record(cache_dir: Path = CACHE_DIR, fixtures_dir: Path = FIXTURES) -> int:
+    """실제 API 응답 캐시를 재생용 녹화본으로 복사
+
+    Returns:
+        int: 복사한 페이지 수
+    """
+    pages = sorted(Path(cache_dir).glob(f"{TRADE_ENDPOINT}/*/*/*.xml"))
+    for page in pages:
+        dst = Path(fixtures_dir) / page.relative_to(cache_dir)
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(page, dst)
+    return len(pages)
+
+
+def _item(row: pd.Series) -> str:
+    # 사용하지 않는 필드도 실제 응답처럼 포함(파싱 비용을 맞추기 위해)
+    return (
+        f"<item><aptDong> </aptDong><aptNm>{escape(row['단지명'])}</aptNm><aptSeq>{row['지역코드']}-1</aptSeq>"
+        f"<bonbun>0001</bonbun><bubun>0000</bubun><buildYear>2005</buildYear><buyerGbn>개인</buyerGbn>"
+        f"<cdealDay> </cdealDay><cdealType> </cdealType><dealAmount>{row['거래금액']:,}</dealAmount>"
+        f"<dealDay>1</dealDay><dealMonth>{row['계약월']}</dealMonth><dealYear>{row['계약연도']}</dealYear>"
+        f"<dealingGbn>{escape(row['거래유형'] or '')}</dealingGbn><estateAgentSggNm> </estateAgentSggNm>"
+        f"<excluUseAr>{row['전용면적']}</excluUseAr><floor>5</floor><jibun>1</jibun><landLeaseholdGbn>N</landLeaseholdGbn>"
+        f"<rgstDate> </rgstDate><roadNm> </roadNm><sggCd>{row['지역코드']}</sggCd><slerGbn>개인</slerGbn>"
+        f"<umdCd>10100</umdCd><umdNm>{escape(row['법정동'])}</umdNm></item>"
+    )
+
+
+class MockApi:
+    """로컬 대체 서버(`with` 안에서 실행)
+
+    Args:
+        scale (int, optional): 합성 실거래가 응답의 배수. Defaults to 1.
+        latency (float, optional): 요청마다 더할 지연(초). Defaults to 0.
+        fixtures_dir (Path, optional): 녹화된 응답 위치. Defaults to FIXTURES.
+    """
+
+    def __init__(self, scale: int = 1, latency: float = 0, fixtures_dir: Path = FIXTURES, port: int = 0) -> None:
+        self.scale = scale
+        self.latency = latency
+        self.fixtures_dir = Path(fixtures_dir)
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._thread: threading.Thread = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def __enter__(self) -> "MockApi":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def warm(self) -> None:
+        """합성 응답에 쓸 거래를 미리 만들어 둠(측정에서 대체 서버의 준비 시간을 빼기 위해)"""
+        for file in apt_trade_files():
+            month_dir = Path(file).parent
+            self._items(month_dir.parent.name.split("=", 1)[1], month_dir.name.split("=", 1)[1])
+
+    @lru_cache(maxsize=None)
+    def _items(self, lawd_code: str, deal_ym: str) -> tuple[str, ...]:
+        if not apt_trade_partition(lawd_code, deal_ym).exists():
+            return ()
+        df = read_apt_trade(lawd_code, deal_ym)
+        return tuple(_item(row) for _, row in df.iterrows())
+
+    def apt_trade(self, params: dict) -> bytes:
+        lawd_code, deal_ym = params["LAWD_CD"], params["DEAL_YMD"]
+        page, n_rows = int(params.get("pageNo", 1)), int(params.get("numOfRows", 10))
+        recorded = self.fixtures_dir / TRADE_ENDPOINT / lawd_code / deal_ym / f"{page}_{n_rows}.xml"
+        if recorded.exists():
+            return recorded.read_bytes()
+
+        items = self._items(lawd_code, deal_ym)
+        total = len(items) * self.scale
+        start, stop = (page - 1) * n_rows, min(page * n_rows, total)
+        body = "".join(items[i % len(items)] for i in range(start, stop))
+        return (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?><response>'
+            "<header><resultCode>000</resultCode><resultMsg>OK</resultMsg></header>"
+            f"<body><items>{body}</items><numOfRows>{n_rows}</numOfRows><pageNo>{page}</pageNo>"
+            f"<totalCount>{total}</totalCount></body></response>"
+        ).encode()
+
+    @lru_cache(maxsize=None)
+    def lawd_code(self) -> bytes:
+        df = pd.read_csv(OUT2, dtype="string")
+        rows = [
+            {"region_cd": f"{code}00000", "sido_cd": code[:2], "sgg_cd": code[2:], "umd_cd": "000", "ri_cd": "00", "locatadd_nm": name}
+            for code, name in zip(df["sido_sgg"], df["locatadd_nm"])
+        ]
+        head = [{"totalCount": len(rows)}, {"numOfRows": "1000", "pageNo": "1", "type": "JSON"}, {"RESULT": {"resultCode": "INFO-0", "resultMsg": "NOMAL SERVICE"}}]
+        return json.dumps({"StanReginCd": [{"head": head}, {"row": rows}]}, ensure_ascii=False).encode()
+
+    @lru_cache(maxsize=None)
+    def hadm_area(self) -> bytes:
+        import geopandas as gpd
+
+        gdf = gpd.read_file(OUT4).to_crs("EPSG:5179")    # 실제 API는 UTM-K 좌표
+        return gdf.to_json(drop_id=True, ensure_ascii=False).encode()
+
+    @staticmethod
+    def geocode(params: dict) -> bytes:
+        address = params.get("address", "")
+        digest = hashlib.sha1(address.encode()).digest()
+        if digest[0] % 20 == 0:
+            return json.dumps({"errCd": -100, "errMsg": "검색결과가 존재하지 않습니다"}).encode()    # 일부는 결과 없음
+        x, y = 126.8 + digest[1] / 255 * 0.4, 37.45 + digest[2] / 255 * 0.2    # 서울 범위의 고정 좌표
+        return json.dumps({"errCd": 0, "result": {"resultdata": [{"x": f"{x}", "y": f"{y}"}]}}).encode()
+
+    def respond(self, path: str, params: dict) -> tuple[str, bytes]:
+        if path.endswith(f"/{TRADE_ENDPOINT}"):
+            return "application/xml", self.apt_trade(params)
+        if path.endswith("/getStanReginCdList"):
+            return "application/json", self.lawd_code()
+        if path.endswith("/authentication.json"):
+            result = {"accessToken": "bench", "accessTimeout": f"{int((time.time() + 24 * 60 * 60) * 1000)}"}
+            return "application/json", json.dumps({"errCd": 0, "result": result}).encode()
+        if path.endswith("/hadmarea.geojson"):
+            return "application/json", self.hadm_area()
+        if path.endswith("/geocodewgs84.json"):
+            return "application/json", self.geocode(params)
+        raise KeyError(path)
+
+    def _handler(self) -> type[BaseHTTPRequestHandler]:
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"    # 연결 재사용(keep-alive)
+            disable_nagle_algorithm = True    # 헤더·본문을 나눠 보내도 지연(delayed ACK) 없이
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                params = {key: values[0] for key, values in parse_qs(url.query).items()}
+                with api._lock:
+                    api.requests += 1
+                if api.latency:
+                    time.sleep(api.latency)
+                try:
+                    content_type, content = api.respond(url.path, params)
+                except KeyError:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", f"{len(content)}")
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="data.go.kr·SGIS API 로컬 대체 서버")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--scale", type=int, default=1)
+    parser.add_argument("--latency", type=float, default=0, help="요청마다 더할 지연(초)")
+    parser.add_argument("--record", action="store_true", help="output/cache의 응답을 녹화본으로 복사하고 종료")
+    args = parser.parse_args()
+    if args.record:
+        print(f"recorded {record()} pages to {FIXTURES}")
+    else:
+        with MockApi(scale=args.scale, latency=args.latency, port=args.port) as api:
+            print(f"DATAGO_URL={api.url} SGIS_URL={api.url}")
+            threading.Event().wait()
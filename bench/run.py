@@ -0,0 +1,158 @@
+"""오프라인 벤치마크(로컬 대체 API 서버 + 합성 실거래가)
+
+    python -m bench.run                             # 1배, 10배 전체 단계
+    python -m bench.run --scales 1 100 1000 --stages aggregate cube
+    python -m bench.run --compare HEAD~3            # 다른 커밋의 결과와 비교
+
+단계마다 새 프로세스를 임시 작업 디렉터리(DATA_OUT_DIR)에서 실행해 처리량(records/s),
+최대 메모리(peak RSS), 소요 시간을 재고 `bench/results.jsonl`에 커밋별로 쌓는다.
+"""
+import argparse
+from datetime import datetime
+import json
+import os
+from pathlib import Path
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from bench.mock_server import MockApi
+from bench.stages import STAGES
+from bench.synthetic import make_trades
+from utils.config import OUT_DIR, WORK_DIR
+
+RESULTS = Path(__file__).parent / "results.jsonl"
+PREREQUISITES = ["region_code.csv", "geo_data.geojson", "avg_price.csv", "merge.geojson", "merge.parquet", "merge_z*.geojson"]    # 단계를 따로 실행할 때 필요한 입력
+REGRESSION = 1.10    # 10% 이상 느려지면 표시
+
+
+def _git(*args: str) -> str:
+    return subprocess.run(["git", *args], cwd=WORK_DIR, capture_output=True, text=True).stdout.strip()
+
+
+def prepare_workspace(ws: Path, scale: int) -> int:
+    """작업 디렉터리에 입력 파일과 `scale`배 합성 실거래가를 준비
+
+    Returns:
+        int: 합성 거래 수
+    """
+    ws.mkdir(parents=True, exist_ok=True)
+    for pattern in PREREQUISITES:
+        for src in OUT_DIR.glob(pattern):
+            shutil.copyfile(src, ws / src.name)
+    return make_trades(scale, ws / "apt_trade")
+
+
+def run_stage(stage: str, ws: Path, api: MockApi, args: argparse.Namespace) -> dict:
+    env = {
+        **os.environ,
+        "PYTHONPATH": str(WORK_DIR),
+        "DATA_OUT_DIR": str(ws),
+        "DATAGO_URL": api.url,
+        "SGIS_URL": api.url,
+        "DATAGO_KEY": "bench",
+        "SGIS_ID": "bench",
+        "SGIS_KEY": "bench",
+        "MPLBACKEND": "Agg",
+    }
+    cmd = [sys.executable, "-m", "bench.stages", stage, "--workers", f"{args.workers}", "--months", *args.months]
+    if not args.rate_limit:
+        cmd.append("--unlimited")
+    proc = subprocess.run(cmd, cwd=WORK_DIR, env=env, capture_output=True, text=True)
+    if proc.returncode:
+        raise RuntimeError(f"[{stage}] failed\n{proc.stderr[-2000:]}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def load_results(path: Path = RESULTS) -> list[dict]:
+    if not path.exists():
+        return []
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines() if line]
+
+
+def compare(results: list[dict], commit: str, baseline: str = None) -> None:
+    """같은 (단계, 배수)의 최근 결과를 기준 커밋과 비교해 출력"""
+    def latest(rows):
+        return {(row["stage"], row["scale"]): row for row in rows}
+
+    current = latest(row for row in results if row["commit"] == commit)
+    if baseline:
+        baseline = _git("rev-parse", baseline) or baseline
+        before = latest(row for row in results if row["commit"].startswith(baseline))
+    else:    # 이전에 측정한 마지막 커밋
+        previous = [row for row in results if row["commit"] != commit]
+        before = latest(row for row in previous if row["commit"] == previous[-1]["commit"]) if previous else {}
+    if not before:
+        print("no baseline results")
+        return
+
+    print(f"\n{'stage':10} {'scale':>6} {'before(s)':>10} {'after(s)':>10} {'ratio':>7}")
+    for key, row in sorted(current.items()):
+        if key in before:
+            ratio = row["seconds"] / before[key]["seconds"]
+            flag = "  slower" if ratio > REGRESSION else "  faster" if ratio < 1 / REGRESSION else ""
+            print(f"{key[0]:10} {key[1]:>6} {before[key]['seconds']:>10.2f} {row['seconds']:>10.2f} {ratio:>7.2f}{flag}")
+
+
+def main(argv: list[str] = None) -> None:
+    parser = argparse.ArgumentParser(description="오프라인 벤치마크")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10], help="합성 실거래가 배수(1~1000)")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--months", nargs=2, default=["202401", "202412"], help="수집 단계의 시작·끝 계약년월")
+    parser.add_argument("--repeat", type=int, default=1, help="반복 횟수(소요 시간은 중앙값)")
+    parser.add_argument("--latency", type=float, default=0, help="대체 서버의 요청당 지연(초)")
+    parser.add_argument("--rate-limit", action="store_true", help="실제 API 호출 한도를 그대로 적용")
+    parser.add_argument("--compare", nargs="?", const="", default=None, help="비교할 커밋(생략하면 직전 측정 커밋)")
+    parser.add_argument("--no-save", action="store_true", help="결과를 저장하지 않음")
+    args = parser.parse_args(argv)
+
+    commit = _git("rev-parse", "HEAD")
+    dirty = bool(_git("status", "--porcelain", "--untracked-files=no"))
+    rows = []
+    with tempfile.TemporaryDirectory(prefix="bench_") as tmp, MockApi(latency=args.latency) as api:
+        if "collect" in args.stages:
+            api.warm()
+        for scale in args.scales:
+            api.scale = scale
+            ws = Path(tmp) / f"x{scale}"
+            n_trades = prepare_workspace(ws, scale)
+            print(f"scale x{scale}: {n_trades:,} trades")
+            for stage in args.stages:
+                stage_ws = ws / "collect" if stage == "collect" else ws    # 수집은 합성 데이터를 덮어쓰지 않도록 따로
+                if stage == "collect":
+                    stage_ws.mkdir(exist_ok=True)
+                    shutil.copyfile(ws / "region_code.csv", stage_ws / "region_code.csv")
+                runs = [run_stage(stage, stage_ws, api, args) for _ in range(args.repeat)]
+                seconds = statistics.median(run["seconds"] for run in runs)
+                row = {
+                    "commit": commit,
+                    "dirty": dirty,
+                    "date": datetime.now().isoformat(timespec="seconds"),
+                    "host": platform.node(),
+                    "python": platform.python_version(),
+                    "workers": args.workers,
+                    "scale": scale,
+                    "stage": stage,
+                    "seconds": round(seconds, 4),
+                    "records": runs[-1]["records"],
+                    "records_per_sec": round(runs[-1]["records"] / seconds, 1) if seconds else None,
+                    "peak_rss_mb": round(max(run["peak_rss_mb"] for run in runs), 1),
+                    "spans": runs[-1].get("spans", {}),
+                }
+                rows.append(row)
+                print(f"  {stage:10} {seconds:8.2f}s {row['records']:>12,} rec {row['records_per_sec'] or 0:>12,.0f} rec/s {row['peak_rss_mb']:>8.0f} MB")
+
+    results = load_results()
+    if not args.no_save:
+        with RESULTS.open("a", encoding="utf-8") as fp:
+            fp.writelines(json.dumps(row, ensure_ascii=False) + "\n" for row in rows)
+    if args.compare is not None:
+        compare(results + rows, commit, args.compare or None)
+
+
+if __name__ == "__main__":
+    main()
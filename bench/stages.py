@@ -0,0 +1,122 @@
+"""벤치마크 단계 하나를 새 프로세스에서 실행하고 결과를 JSON 한 줄로 출력
+
+    DATA_OUT_DIR=/tmp/ws DATAGO_URL=http://127.0.0.1:8000 python -m bench.stages collect
+
+최대 메모리(ru_maxrss)가 단계별로 분리되도록 `bench.run`이 단계마다 이 모듈을 따로 실행한다.
+"""
+import argparse
+import json
+import os
+import resource
+import time
+
+STAGES = ["collect", "geocode", "boundary", "aggregate", "merge", "image", "cube", "app"]
+
+
+def peak_rss_mb() -> float:
+    """이 프로세스의 최대 메모리(MB)
+
+    ru_maxrss는 fork한 부모의 값을 물려받으므로 Linux에서는 /proc의 VmHWM을 쓴다.
+    """
+    try:
+        with open("/proc/self/status", encoding="utf-8") as fp:
+            for line in fp:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _features(path) -> int:
+    return len(json.loads(path.read_bytes())["features"])
+
+
+def _trade_rows() -> int:
+    import pyarrow.dataset as ds
+    from utils.data_load import OUT3_DIR
+
+    return ds.dataset(OUT3_DIR, format="parquet").count_rows()
+
+
+def run_stage(name: str, workers: int = 1, months: tuple[str, str] = ("202401", "202412")) -> int:
+    """단계 실행
+
+    Returns:
+        int: 처리한 레코드 수(거래 또는 지역)
+    """
+    # 반복 측정도 처음부터 다시 하도록 이전 산출물·캐시를 지움(DATA_OUT_DIR 안에서만 실행)
+    if name == "collect":
+        import shutil
+        from utils.data_load import OUT3_DIR, apt_trade_to_parquet, month_range
+        shutil.rmtree(OUT3_DIR, ignore_errors=True)
+        apt_trade_to_parquet(month_range(*months), workers=workers, use_cache=False)
+        return _trade_rows()
+    if name == "geocode":
+        import pandas as pd
+        from utils.data_load import OUT8, complex_to_geocode
+        from utils.config import CACHE_DIR
+        (CACHE_DIR / "geocode.sqlite").unlink(missing_ok=True)
+        complex_to_geocode(workers=workers)
+        return len(pd.read_csv(OUT8))
+    if name == "boundary":
+        from utils.config import CACHE_DIR
+        from utils.data_load import OUT4, adm_cd_to_geojson
+        (CACHE_DIR / "boundary.sqlite").unlink(missing_ok=True)
+        adm_cd_to_geojson("11", "1")
+        return _features(OUT4)
+    if name == "aggregate":
+        import preprocess
+        from utils.aggregate import OUT_AGG
+        OUT_AGG.unlink(missing_ok=True)    # 증분 갱신이 아닌 전체 집계
+        preprocess.avg_price_to_csv(workers=workers)
+        return _trade_rows()
+    if name == "merge":
+        import shutil
+        import preprocess
+        from utils.geometry import SIMPLIFY_CACHE
+        shutil.rmtree(SIMPLIFY_CACHE, ignore_errors=True)
+        preprocess.merge_datatframe()
+        return _features(preprocess.OUT6)
+    if name == "image":
+        import visualize
+        visualize.geojson_to_img()
+        return _features(visualize.OUT_DIR / "merge.geojson")
+    if name == "cube":
+        from utils.cube import build_cube
+        build_cube(workers=workers)
+        return _trade_rows()
+    if name == "app":
+        from streamlit.testing.v1 import AppTest
+        from utils.config import OUT_DIR, WORK_DIR
+        at = AppTest.from_file(str(WORK_DIR / "app.py"), default_timeout=120).run()
+        if at.exception:
+            raise RuntimeError(at.exception[0].message)
+        return _features(OUT_DIR / "merge.geojson")
+    raise ValueError(f"invalid stage, got {name!r}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("stage", choices=STAGES)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--months", nargs=2, default=["202401", "202412"])
+    parser.add_argument("--unlimited", action="store_true", help="API 호출 한도 없이 실행(대체 서버 전용)")
+    args = parser.parse_args()
+    if not os.getenv("DATA_OUT_DIR"):
+        parser.error("DATA_OUT_DIR must point to a scratch directory (stages delete their previous outputs)")
+
+    if args.unlimited:
+        import utils.data_utils as data_utils
+        data_utils.DATAGO_LIMITER = data_utils.RateLimiter(calls=10 ** 6, period=1)
+        data_utils.SGIS_LIMITER = data_utils.RateLimiter(calls=10 ** 6, period=1)
+
+    from utils.metrics import METRICS
+
+    started = time.perf_counter()
+    records = run_stage(args.stage, workers=args.workers, months=tuple(args.months))
+    seconds = time.perf_counter() - started
+    spans: dict[str, float] = {}    # 구간 이름별 합계(API 호출, 파싱, 호출 한도 대기 등)
+    for span in METRICS.summary()["spans"]:
+        spans[span["name"]] = spans.get(span["name"], 0) + round(span["seconds"], 4)
+    print(json.dumps({"seconds": seconds, "records": records, "peak_rss_mb": peak_rss_mb(), "spans": spans}))
@@ -0,0 +1,87 @@
+"""시작 시간(cold start) 측정
+
+    python -m bench.startup                 # 대상별 새 프로세스 시작~import 완료 시간
+    python -m bench.startup --repeat 10 --save
+
+대상마다 새 인터프리터를 띄워 import를 마칠 때까지의 시간(인터프리터 시작 포함)과
+불러온 무거운 패키지를 출력한다. 앱은 `app.py`의 최상위 import 문만 실행해 잰다(화면은 그리지 않음).
+"""
+import argparse
+import ast
+from datetime import datetime
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+from bench.run import RESULTS, _git
+from utils.config import WORK_DIR
+
+HEAVY = ["pandas", "pyarrow", "requests", "xmltodict", "geopandas", "shapely", "pyproj", "pyogrio", "matplotlib", "plotly", "streamlit"]
+TARGETS = {
+    "config": "import utils.config",
+    "api": "import api",
+    "pipeline": "import pipeline",
+    "app": None,    # app.py의 import 문
+}
+
+
+def app_imports(path=WORK_DIR / "app.py") -> str:
+    """스크립트의 최상위 import 문만 모은 코드"""
+    tree = ast.parse(path.read_text(encoding="utf-8"))
+    return "\n".join(ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom)))
+
+
+def measure(code: str) -> dict:
+    """새 프로세스에서 `code`를 실행
+
+    Returns:
+        dict: seconds(프로세스 시작부터 종료까지), modules(불러온 HEAVY 패키지)
+    """
+    probe = f"{code}\nimport json, sys\nprint(json.dumps([m for m in {HEAVY!r} if m in sys.modules]))"
+    started = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-c", probe], cwd=WORK_DIR, capture_output=True, text=True)
+    seconds = time.perf_counter() - started
+    if proc.returncode:
+        raise RuntimeError(proc.stderr[-2000:])
+    return {"seconds": seconds, "modules": json.loads(proc.stdout.strip().splitlines()[-1])}
+
+
+def main(argv: list[str] = None) -> None:
+    parser = argparse.ArgumentParser(description="시작 시간 측정")
+    parser.add_argument("--targets", nargs="+", choices=TARGETS, default=list(TARGETS))
+    parser.add_argument("--repeat", type=int, default=5, help="반복 횟수(소요 시간은 중앙값)")
+    parser.add_argument("--save", action="store_true", help=f"{RESULTS.name}에 startup:<대상> 단계로 저장")
+    args = parser.parse_args(argv)
+
+    commit = _git("rev-parse", "HEAD")
+    rows = []
+    print(f"{'target':10} {'seconds':>8}  modules")
+    for target in args.targets:
+        code = TARGETS[target] or app_imports()
+        measure(code)    # 첫 실행은 .pyc 생성·디스크 캐시를 채우므로 버림
+        runs = [measure(code) for _ in range(args.repeat)]
+        seconds = statistics.median(run["seconds"] for run in runs)
+        print(f"{target:10} {seconds:>8.3f}  {','.join(runs[-1]['modules']) or '-'}")
+        rows.append({
+            "commit": commit,
+            "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "host": platform.node(),
+            "python": platform.python_version(),
+            "scale": 1,
+            "stage": f"startup:{target}",
+            "seconds": round(seconds, 4),
+            "records": 0,
+            "modules": runs[-1]["modules"],
+        })
+
+    if args.save:
+        with RESULTS.open("a", encoding="utf-8") as fp:
+            fp.writelines(json.dumps(row, ensure_ascii=False) + "\n" for row in rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+"""저장된 실거래가를 늘린 합성 데이터(지역·월·단지 구성은 같고 거래 건수만 `scale`배)"""
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from utils.data_load import OUT3_DIR, apt_trade_files
+
+
+def make_trades(scale: int, out_dir: Path, src_dir: Path = OUT3_DIR, seed: int = 0) -> int:
+    """원본 파티션마다 거래를 `scale`번 복제하고 금액·면적을 조금씩 흔들어 `out_dir`에 같은 배치로 저장
+
+    파티션 하나씩 만들어 쓰므로 1000배도 메모리는 파티션 하나 크기에 비례한다.
+
+    Returns:
+        int: 저장한 거래 수
+    """
+    rng = np.random.default_rng(seed)
+    n_rows = 0
+    for file in apt_trade_files():
+        src = Path(file)
+        table = pq.read_table(src)
+        table = pa.concat_tables([table] * scale)
+        amount = table["거래금액"].to_numpy() * rng.uniform(0.9, 1.1, table.num_rows)
+        area = table["전용면적"].to_numpy() * rng.uniform(0.98, 1.02, table.num_rows)
+        table = table.set_column(table.schema.get_field_index("거래금액"), "거래금액", pa.array(amount.round().astype("int64")))
+        table = table.set_column(table.schema.get_field_index("전용면적"), "전용면적", pa.array(area.round(4)))
+
+        dst = Path(out_dir) / src.relative_to(src_dir)
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        pq.write_table(table, dst)
+        n_rows += table.num_rows
+    return n_rows
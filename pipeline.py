@@ -0,0 +1,284 @@
+"""실거래가 수집·가공 파이프라인
+
+    python pipeline.py --region 서울특별시 --start 202401 --end 202412 --workers 8
+    python pipeline.py --offline            # API 호출 없이 가공 단계만
+    python pipeline.py --only merge --force # 특정 단계만 강제로 다시 실행
+    python pipeline.py --trace trace.json --metrics metrics.prom --profile merge    # 구간별 시간·카운터, 프로파일
+
+단계는 의존 관계(DAG)에 따라 실행되고, 서로 의존하지 않는 단계는 동시에 실행된다.
+입력(상위 단계 산출물의 해시와 매개변수)이 지난 실행과 같고 산출물이 그대로면 건너뛴다.
+"""
+import argparse
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import date
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+import threading
+import time
+from typing import Callable
+
+from utils.config import BOUNDARY_YEAR, OUT_DIR
+from utils.metrics import METRICS, profile
+
+logger = logging.getLogger(__name__)
+STATE = OUT_DIR / "pipeline_state.json"
+
+
+def fingerprint(path: Path) -> str | None:
+    """파일은 내용 해시, 디렉터리는 (상대 경로, 크기, 수정 시각) 목록의 해시. 없으면 None"""
+    path = Path(path)
+    if path.is_file():
+        return hashlib.sha1(path.read_bytes()).hexdigest()
+    if path.is_dir():
+        digest = hashlib.sha1()
+        for file in sorted(p for p in path.rglob("*") if p.is_file()):
+            stat = file.stat()
+            digest.update(f"{file.relative_to(path)}:{stat.st_size}:{stat.st_mtime_ns}\n".encode())
+        return digest.hexdigest()
+    return None
+
+
+class Stage:
+    """파이프라인 단계
+
+    Args:
+        name (str): 단계 이름
+        run (Callable[[], None]): 실행 함수
+        outputs (list[Path]): 산출물(파일 또는 디렉터리)
+        deps (list[str], optional): 먼저 실행할 단계. Defaults to None.
+        params (dict, optional): 결과에 영향을 주는 매개변수. Defaults to None.
+        fetch (bool, optional): 외부 API에서 받는 단계. 캐시가 필요한 부분만 받으므로 항상 실행하고,
+            `--offline`이면 건너뛴다. Defaults to False.
+        main_thread (bool, optional): 스레드에 안전하지 않은 전역 상태(matplotlib pyplot·백엔드)를 쓰는 단계.
+            작업 스레드가 아닌 메인 스레드에서 하나씩 실행한다. Defaults to False.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        run: Callable[[], None],
+        outputs: list[Path],
+        deps: list[str] = None,
+        params: dict = None,
+        fetch: bool = False,
+        main_thread: bool = False,
+    ) -> None:
+        self.name = name
+        self.run = run
+        self.outputs = outputs
+        self.deps = deps or []
+        self.params = params or {}
+        self.fetch = fetch
+        self.main_thread = main_thread
+
+    def output_hash(self) -> dict[str, str | None]:
+        return {str(path.relative_to(OUT_DIR)): fingerprint(path) for path in self.outputs}
+
+
+def build_stages(args: argparse.Namespace) -> dict[str, Stage]:
+    # 무거운 모듈은 실행할 때만 불러옴(--help, 건너뛰는 실행을 가볍게)
+    def region_code():
+        from utils.data_load import sido_sgg_to_csv
+        sido_sgg_to_csv(region=args.region)
+
+    def apt_trade():
+        from utils.data_load import apt_trade_to_parquet, month_range
+        apt_trade_to_parquet(month_range(args.start, args.end), workers=args.workers)
+
+    def boundary():
+        from utils.data_load import adm_cd_to_geojson
+        forced = args.force and (not args.only or "boundary" in args.only)    # --force는 지정한 단계에만 적용
+        adm_cd_to_geojson(args.adm_cd, "1", year=args.boundary_year, use_cache=not (args.refresh_boundary or forced))
+
+    def trade_scope() -> dict[str, list[str]]:
+        """수집 대상과 같은 지역코드·계약년월(집계 단계가 다른 실행에서 받아 둔 파티션을 섞지 않도록)"""
+        import pandas as pd
+        from utils.data_load import OUT2, month_range
+        return {"sgg_cd": pd.read_csv(OUT2, dtype="string")["sido_sgg"].tolist(), "deal_ym": month_range(args.start, args.end)}
+
+    def avg_price():
+        import preprocess
+        preprocess.avg_price_to_csv(**trade_scope(), workers=args.workers)
+
+    def merge():
+        import preprocess
+        preprocess.merge_datatframe()
+
+    def image():
+        import matplotlib
+        matplotlib.use("Agg")    # 화면 없이 파일로만 저장(메인 스레드에서 실행)
+        import visualize
+        visualize.geojson_to_img()
+
+    def cube():
+        from utils.cube import build_cube
+        build_cube(**trade_scope(), workers=args.workers)
+
+    def maps():
+        import matplotlib
+        matplotlib.use("Agg")
+        import visualize
+        visualize.render_maps(visualize.map_variants(), workers=args.workers)
+
+    from utils.data_load import OUT2, OUT3_DIR, OUT4
+    from utils.geometry import SIMPLIFY_LEVELS, level_path, snapshot_path
+
+    merge_geojson = OUT_DIR / "merge.geojson"
+    scope = {"region": args.region, "start": args.start, "end": args.end}
+    stages = [
+        Stage("region_code", region_code, [OUT2], params={"region": args.region}, fetch=True),
+        Stage("apt_trade", apt_trade, [OUT3_DIR], deps=["region_code"], params={"start": args.start, "end": args.end}, fetch=True),
+        Stage("boundary", boundary, [OUT4], params={"adm_cd": args.adm_cd, "year": args.boundary_year}, fetch=True),
+        Stage("avg_price", avg_price, [OUT_DIR / "avg_price.csv"], deps=["region_code", "apt_trade"], params=scope),
+        Stage("merge", merge, [merge_geojson, snapshot_path(merge_geojson), *(level_path(merge_geojson, level) for level in SIMPLIFY_LEVELS)], deps=["boundary", "avg_price"]),
+        Stage("image", image, [OUT_DIR / "geojson.png"], deps=["merge"], main_thread=True),
+        Stage("cube", cube, [OUT_DIR / "trade_cube"], deps=["region_code", "apt_trade"], params=scope),
+        Stage("maps", maps, [OUT_DIR / "maps"], deps=["merge", "cube"], main_thread=True),
+    ]
+    return {stage.name: stage for stage in stages}
+
+
+class Pipeline:
+    """단계 DAG 실행기"""
+
+    def __init__(self, stages: dict[str, Stage], state_path: Path = STATE, profile_stages: list[str] = None) -> None:
+        self.stages = stages
+        self.profile_stages = set(profile_stages or [])    # cProfile로 측정할 단계
+        self.state_path = Path(state_path)
+        self.state: dict = json.loads(self.state_path.read_text(encoding="utf-8")) if self.state_path.exists() else {}
+        self._lock = threading.Lock()
+
+    def input_key(self, stage: Stage) -> str:
+        """매개변수와 상위 단계 산출물 해시로 만든 입력 키"""
+        inputs = {
+            "params": stage.params,
+            "deps": {dep: self.stages[dep].output_hash() for dep in stage.deps},
+        }
+        return hashlib.sha1(json.dumps(inputs, sort_keys=True, ensure_ascii=False).encode()).hexdigest()
+
+    def is_fresh(self, stage: Stage) -> bool:
+        recorded = self.state.get(stage.name, {})
+        outputs = stage.output_hash()
+        if any(value is None for value in outputs.values()):
+            return False
+        return recorded.get("key") == self.input_key(stage) and recorded.get("outputs") == outputs
+
+    def _run(self, stage: Stage, force: bool, offline: bool, dry_run: bool) -> str:
+        if stage.fetch and offline:
+            return "offline"
+        if not force and not stage.fetch and self.is_fresh(stage):
+            return "skip"
+        if dry_run:
+            return "run"
+
+        started = time.perf_counter()
+        with METRICS.span("stage", stage=stage.name), profile(f"stage_{stage.name}", enabled=stage.name in self.profile_stages or None, out_dir=OUT_DIR / "profile"):
+            stage.run()
+        elapsed = time.perf_counter() - started
+        record = {"key": self.input_key(stage), "outputs": stage.output_hash(), "seconds": round(elapsed, 3)}
+        with self._lock:
+            self.state[stage.name] = record
+            tmp = self.state_path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(self.state, indent=2, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp, self.state_path)
+        return f"done {elapsed:.1f}s"
+
+    def select(self, only: list[str] = None) -> list[str]:
+        """실행할 단계(`only`가 주어지면 그 단계와 선행 단계)"""
+        if not only:
+            return list(self.stages)
+        selected, todo = set(), list(only)
+        while todo:
+            name = todo.pop()
+            if name not in self.stages:
+                raise ValueError(f"invalid stage, got {name!r}")
+            if name not in selected:
+                selected.add(name)
+                todo += self.stages[name].deps
+        return [name for name in self.stages if name in selected]
+
+    def run(self, only: list[str] = None, force: bool = False, offline: bool = False, dry_run: bool = False, jobs: int = 2) -> dict[str, str]:
+        """선행 단계가 끝난 단계부터 최대 `jobs`개씩 동시에 실행(`main_thread` 단계는 메인 스레드에서 하나씩)
+
+        Returns:
+            dict[str, str]: 단계별 결과("skip", "offline", "run", "done ...s")
+        """
+        names = self.select(only)
+        forced = set(only or []) if force and only else set(names) if force else set()
+        result: dict[str, str] = {}
+        pending = set(names)
+        running = {}
+        main_ready = []    # 메인 스레드에서 실행할 차례를 기다리는 단계
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            while pending or running or main_ready:
+                for name in sorted(pending):
+                    if all(dep in result for dep in self.stages[name].deps if dep in names):
+                        stage = self.stages[name]
+                        if stage.main_thread:
+                            main_ready.append(name)
+                        else:
+                            running[executor.submit(self._run, stage, name in forced, offline, dry_run)] = name
+                        pending.discard(name)
+                if main_ready:
+                    name = main_ready.pop(0)    # 작업 스레드의 단계는 그동안 계속 실행
+                    result[name] = self._run(self.stages[name], name in forced, offline, dry_run)
+                    logger.info(f"[{name}] {result[name]}")
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    result[name] = future.result()
+                    logger.info(f"[{name}] {result[name]}")
+        return result
+
+
+def main(argv: list[str] = None) -> None:
+    today = date.today()
+    parser = argparse.ArgumentParser(description="아파트 매매 실거래가 수집·가공 파이프라인")
+    parser.add_argument("--region", action="append", help="법정동 지역명(여러 번 지정 가능). 기본값: 서울특별시")
+    parser.add_argument("--adm-cd", default="11", help="SGIS 행정구역코드(경계). 기본값: 11(서울특별시)")
+    parser.add_argument("--boundary-year", default=BOUNDARY_YEAR, help=f"SGIS 경계 기준연도. 기본값: {BOUNDARY_YEAR}")
+    parser.add_argument("--refresh-boundary", action="store_true", help="저장된 경계가 최신이어도 SGIS에서 다시 받아 바뀐 행정구역만 갱신(--force도 같음)")
+    parser.add_argument("--start", default="202401", help="시작 계약년월(YYYYMM)")
+    parser.add_argument("--end", default=f"{today.year}{today.month:02}", help="끝 계약년월(YYYYMM). 기본값: 이번 달")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="단계 안의 동시 작업 수")
+    parser.add_argument("--jobs", type=int, default=2, help="동시에 실행할 단계 수")
+    parser.add_argument("--only", action="append", help="이 단계(와 선행 단계)만 실행")
+    parser.add_argument("--force", action="store_true", help="최신이어도 다시 실행(--only와 함께 쓰면 그 단계만)")
+    parser.add_argument("--offline", action="store_true", help="API를 호출하는 단계를 건너뜀")
+    parser.add_argument("--dry-run", action="store_true", help="실행할 단계만 출력")
+    parser.add_argument("--trace", type=Path, help="구간별 시간을 Chrome trace(JSON)로 저장할 경로")
+    parser.add_argument("--metrics", type=Path, help="카운터·구간 시간을 Prometheus 텍스트로 저장할 경로")
+    parser.add_argument("--metrics-port", type=int, help="실행 중 /metrics를 제공할 포트")
+    parser.add_argument("--profile", action="append", help="cProfile로 측정할 단계(output/profile/stage_{단계}.prof)")
+    parser.add_argument("--log-spans", action="store_true", help="API 호출·파싱 등 구간마다 JSON 로그 출력")
+    args = parser.parse_args(argv)
+    args.region = args.region or ["서울특별시"]
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    if args.log_spans:
+        logging.getLogger("utils.metrics").setLevel(logging.DEBUG)
+    METRICS.trace = args.trace is not None
+    if args.metrics_port:
+        METRICS.serve(args.metrics_port)
+
+    pipeline = Pipeline(build_stages(args), profile_stages=args.profile)
+    try:
+        result = pipeline.run(only=args.only, force=args.force, offline=args.offline, dry_run=args.dry_run, jobs=args.jobs)
+    finally:
+        if args.trace:
+            METRICS.write_trace(args.trace)
+        if args.metrics:
+            args.metrics.write_text(METRICS.prometheus(), encoding="utf-8")
+    for name, status in result.items():
+        print(f"{name:12} {status}")
+    for span in METRICS.summary()["spans"]:
+        if span["name"] == "ratelimit_wait" and span["seconds"] >= 1:
+            print(f"rate limit wait ({span['limiter']}): {span['seconds']:.1f}s over {span['count']} calls")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,25 @@
 from pathlib import Path
+import logging
+import re
 import pandas as pd 
 import geopandas as gpd
-from utils.data_load import OUT_DIR, OUT2, OUT3, OUT4
+from utils.data_load import OUT_DIR, OUT2, OUT4, OUT4_DONG
+from utils.aggregate import aggregate_apt_trade, refresh_trade_aggregates
+from utils.geometry import SIMPLIFY_LEVELS, BoundaryIndex, read_geoframe, simplify_coverage, write_levels, write_snapshot
+from utils.metrics import METRICS
+
+logger = logging.getLogger(__name__)
 
 OUT5 = OUT_DIR / "avg_price.csv"
 
-def avg_price_to_csv():
-    df_apt = pd.read_csv(OUT3, dtype="string")
-    df_apt["거래금액"] = df_apt["거래금액"].str.replace(",", "")    # 콤마 제거
-    df_apt = df_apt.astype({"전용면적": float, "거래금액": int})    # 숫자 변환
-    df_apt["면적당금액"] = df_apt["거래금액"] / df_apt["전용면적"]
-    df_pivot = df_apt.pivot_table(index="지역코드", values=["전용면적", "면적당금액"], aggfunc="mean")
-    df_reindex = df_pivot.reset_index(drop=False)
+def avg_price_to_csv(sgg_cd: str | list[str] = None, deal_ym: str | list[str] = None, workers: int = 1):
+    df_agg = refresh_trade_aggregates(sgg_cd, deal_ym, workers=workers)    # 바뀐 파티션만 재집계한 지역×월 집계
+    df_sum = df_agg.groupby("지역코드")[["전용면적_sum", "전용면적_count", "면적당금액_sum", "면적당금액_count"]].sum()
+    df_mean = pd.DataFrame({
+        "전용면적": df_sum["전용면적_sum"] / df_sum["전용면적_count"],
+        "면적당금액": df_sum["면적당금액_sum"] / df_sum["면적당금액_count"],
+    })
+    df_reindex = df_mean.reset_index(drop=False)
     
     df_sido_sgg = pd.read_csv(OUT2, dtype="string")
     df_merge = pd.merge(df_reindex, df_sido_sgg, left_on="지역코드", right_on="sido_sgg", how="inner")
@@ -26,14 +34,65 @@ def merge_datatframe():
     gdf_price = gpd.read_file(OUT5, encoding="utf-8")    # 실거래가
     gdf_merge = pd.merge(gdf_geo, gdf_price, left_on="adm_nm", right_on="locatadd_nm", how="inner")
 
-    gdf_filter = gdf_merge.filter(["adm_nm", "avg_area", "avg_price", "geometry"])
+    # 이름이 맞지 않아 빠지는 지역(경계 개편, 지역명 변경 등)
+    f_no_price = ~gdf_geo["adm_nm"].isin(gdf_price["locatadd_nm"])
+    f_no_geo = ~gdf_price["locatadd_nm"].isin(gdf_geo["adm_nm"])
+    if f_no_price.any():
+        logger.warning(f"실거래가와 연결되지 않은 경계 {f_no_price.sum()}개: {', '.join(gdf_geo.loc[f_no_price, 'adm_nm'])}")
+    if f_no_geo.any():
+        logger.warning(f"경계와 연결되지 않은 실거래가 {f_no_geo.sum()}개: {', '.join(gdf_price.loc[f_no_geo, 'locatadd_nm'])}")
+
+    gdf_filter = gdf_merge.filter(["adm_cd", "sido_sgg", "adm_nm", "avg_area", "avg_price", "geometry"])    # 이후 단계는 코드로 조인
     gdf_result = gdf_filter.astype({"avg_area":float, "avg_price":float})
-    str_jsoned = gdf_result.to_json(drop_id=True, ensure_ascii=False, indent=2)
-    OUT6.write_text(str_jsoned, encoding="utf-8")
+    with METRICS.span("serialize", output=OUT6.name):
+        str_jsoned = gdf_result.to_json(drop_id=True, ensure_ascii=False, separators=(",", ":"))
+        OUT6.write_text(str_jsoned, encoding="utf-8")
+        write_snapshot(gdf_result, OUT6)    # 읽기용 GeoParquet(merge.parquet)
+    with METRICS.span("simplify", output=OUT6.name):
+        write_levels(gdf_result, OUT6)    # 줌 단계별 단순화 경계(merge_z*.geojson)
+
+#####################################################################################
+# 읍면동 단위
+OUT5_DONG = OUT_DIR / "avg_price_dong.csv"
+def dong_price_to_csv(workers: int = 1):
+    agg = aggregate_apt_trade(by=["지역코드", "법정동"], values=["전용면적", "면적당금액"], workers=workers)
+    df_agg = agg.result(quantiles=()).reset_index(drop=False)
+    df_filter = df_agg.filter(["지역코드", "법정동", "면적당금액_count", "전용면적_mean", "면적당금액_mean"])
+    df_filter.columns = ["sido_sgg", "umd_nm", "trade_count", "avg_area", "avg_price"]
+    df_filter.to_csv(OUT5_DONG, index=False)
+
+def _legal_dong_name(adm_dong: str) -> str:
+    """행정동 이름에서 법정동 이름 추정("대치1동" -> "대치동", "상계3.4동" -> "상계동")"""
+    return re.sub(r"[0-9.·,]+동$", "동", adm_dong)
+
+OUT6_DONG_DIR = OUT_DIR / "merge_dong"    # 시군구별 읍면동 경계({sido_sgg}.geojson)
+def merge_dong_dataframe():
+    gdf_sgg = read_geoframe(OUT6)    # 시군구 경계(sido_sgg 포함)
+    gdf_dong = gpd.read_file(OUT4_DONG, encoding="utf-8")    # 읍면동 경계
+    df_price = pd.read_csv(OUT5_DONG, dtype={"sido_sgg": "string"})    # 법정동별 실거래가
+
+    # 읍면동이 속한 시군구를 이름 대신 공간 색인으로 찾음
+    sgg_index = BoundaryIndex.cached(gdf_sgg, key="sido_sgg")
+    gdf_dong["sido_sgg"] = sgg_index.locate_many(gdf_dong.geometry.representative_point().values)
+    gdf_dong["umd_nm"] = gdf_dong["adm_nm"].str.split().str[-1].map(_legal_dong_name)
+    gdf_merge = gdf_dong.merge(df_price, on=["sido_sgg", "umd_nm"], how="left")
+
+    f_no_price = gdf_merge["avg_price"].isna()
+    if f_no_price.any():
+        logger.warning(f"실거래가와 연결되지 않은 읍면동 {f_no_price.sum()}개: {', '.join(gdf_merge.loc[f_no_price, 'adm_nm'])}")
+
+    OUT6_DONG_DIR.mkdir(exist_ok=True)
+    gdf_filter = gdf_merge.filter(["adm_cd", "sido_sgg", "adm_nm", "umd_nm", "trade_count", "avg_area", "avg_price", "geometry"])
+    for sido_sgg, gdf_part in gdf_filter.dropna(subset=["sido_sgg"]).groupby("sido_sgg"):
+        gdf_simple = simplify_coverage(gdf_part, SIMPLIFY_LEVELS[13])    # 시군구를 확대해 보므로 한 단계만
+        str_jsoned = gdf_simple.to_json(drop_id=True, ensure_ascii=False, separators=(",", ":"))
+        (OUT6_DONG_DIR / f"{sido_sgg}.geojson").write_text(str_jsoned, encoding="utf-8")
 
 if __name__ == "__main__":
-    # avg_price_to_csv()
+    # avg_price_to_csv()    # 새 실거래가 파티션이 들어오면 그 부분만 재집계
     merge_datatframe()
+    # dong_price_to_csv()
+    # merge_dong_dataframe()    # adm_cd_to_geojson("11", "2") 이후
 
 
     
\ No newline at end of file
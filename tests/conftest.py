@@ -0,0 +1,9 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# 산출물 경로는 import할 때 정해지므로 utils를 불러오기 전에 임시 작업 디렉터리로 바꿈
+os.environ["DATA_OUT_DIR"] = tempfile.mkdtemp(prefix="tests_")
+os.environ.setdefault("DATAGO_KEY", "test")
+sys.path.insert(0, str(Path(__file__).parent.parent))
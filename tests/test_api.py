@@ -0,0 +1,42 @@
+import asyncio
+
+from api import QueryService
+
+
+def _get(app: QueryService, path: str, **headers: str) -> tuple[int, dict[str, str]]:
+    """ASGI 앱에 GET 요청 -> (상태, 응답 헤더)"""
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": path,
+        "query_string": b"",
+        "headers": [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()],
+    }
+    sent = []
+
+    async def receive():
+        return {"type": "http.request"}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    return sent[0]["status"], {name.decode(): value.decode() for name, value in sent[0]["headers"]}
+
+
+def test_etag_differs_by_encoding(tmp_path):
+    geojson = tmp_path / "merge.geojson"
+    geojson.write_text('{"type":"FeatureCollection","features":[]}' + " " * 2048, encoding="utf-8")
+    app = QueryService(cube_dir=tmp_path / "trade_cube", geojson_path=geojson)
+
+    _, identity = _get(app, "/boundaries")
+    _, gzipped = _get(app, "/boundaries", accept_encoding="gzip")
+    assert gzipped["content-encoding"] == "gzip"
+    assert identity["etag"] != gzipped["etag"]
+
+    # 다른 인코딩의 ETag로는 304가 아님
+    assert _get(app, "/boundaries", if_none_match=gzipped["etag"])[0] == 200
+    assert _get(app, "/boundaries", accept_encoding="gzip", if_none_match=gzipped["etag"])[0] == 304
+    assert _get(app, "/boundaries", if_none_match=f'"other", W/{identity["etag"]}')[0] == 304
+    assert _get(app, "/boundaries", if_none_match="*")[0] == 304
+    assert _get(app, "/boundaries", if_none_match=identity["etag"][:-3] + '"')[0] == 200    # 부분 문자열은 불일치
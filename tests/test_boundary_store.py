@@ -0,0 +1,44 @@
+import json
+
+from utils.data_utils import BoundaryStore
+
+
+def _geojson(**areas: str) -> str:
+    """adm_cd=adm_nm -> 점 하나짜리 경계(좌표는 코드마다 고정)"""
+    features = [
+        {"type": "Feature", "properties": {"adm_cd": adm_cd, "adm_nm": adm_nm}, "geometry": {"type": "Point", "coordinates": [127, int(adm_cd)]}}
+        for adm_cd, adm_nm in areas.items()
+    ]
+    return json.dumps({"type": "FeatureCollection", "features": features}, ensure_ascii=False)
+
+
+def _changes(**changes) -> dict[str, list]:
+    return {"added": [], "removed": [], "renamed": [], "changed": [], **changes}
+
+
+def test_update_reports_join_changes(tmp_path):
+    store = BoundaryStore(tmp_path / "boundary.sqlite")
+    assert store.update("11", "1", "2023", _geojson(**{"1": "가구", "2": "나구"})) == _changes()    # 처음 받음
+    assert store.update("11", "1", "2023", _geojson(**{"1": "가구", "2": "나구"})) == _changes()
+    assert store.update("11", "1", "2023", _geojson(**{"1": "가구", "2": "나구", "3": "다구"})) == _changes(added=["3"])
+    assert store.update("11", "1", "2023", _geojson(**{"1": "가구", "3": "다구"})) == _changes(removed=["2"])
+    # 같은 경계로 다시 생겨도(해시가 같아도) 추가로 알림
+    assert store.update("11", "1", "2023", _geojson(**{"1": "가구", "2": "나구", "3": "다구"})) == _changes(added=["2"])
+    assert store.update("11", "1", "2023", _geojson(**{"1": "가구", "2": "새구", "3": "다구"})) == _changes(renamed=[["2", "나구", "새구"]])
+    assert store.codes("11", "1", "2023") == ["1", "2", "3"]
+    assert [f["properties"]["adm_nm"] for f in json.loads(store.geojson("11", "1", "2023"))["features"]] == ["가구", "새구", "다구"]
+
+
+def test_update_reports_code_stored_under_another_request(tmp_path):
+    store = BoundaryStore(tmp_path / "boundary.sqlite")
+    store.update(None, "1", "2023", _geojson(**{"1": "가구", "2": "나구"}))    # 전국
+    store.update("11", "1", "2023", _geojson(**{"1": "가구"}))
+    assert store.update("11", "1", "2023", _geojson(**{"1": "가구", "2": "나구"})) == _changes(added=["2"])
+
+
+def test_update_reports_changed_boundary(tmp_path):
+    store = BoundaryStore(tmp_path / "boundary.sqlite")
+    store.update("11", "1", "2023", _geojson(**{"1": "가구"}))
+    moved = json.loads(_geojson(**{"1": "가구"}))
+    moved["features"][0]["geometry"]["coordinates"] = [128, 1]
+    assert store.update("11", "1", "2023", json.dumps(moved)) == _changes(changed=["1"])
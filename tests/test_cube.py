@@ -0,0 +1,64 @@
+import pandas as pd
+import pytest
+
+import utils.data_load as data_load
+from utils.aggregate import aggregate_apt_trade
+from utils.cube import TradeCube, build_cube
+from utils.data_load import write_apt_trade
+
+
+@pytest.fixture
+def cube(tmp_path, monkeypatch):
+    """두 지역·두 달의 실거래가(거래유형·단지명 누락 포함)로 만든 큐브"""
+    monkeypatch.setattr(data_load, "OUT3_DIR", tmp_path / "apt_trade")
+    rows = [
+        # 지역코드, 계약연도, 계약월, 거래유형, 법정동, 단지명, 전용면적, 거래금액
+        ("11680", 2024, 1, "중개거래", "대치동", "가", 84.9, 200000),
+        ("11680", 2024, 1, None, "대치동", "가", 84.9, 210000),
+        ("11680", 2024, 2, "직거래", "대치동", None, 59.9, 150000),
+        ("11650", 2024, 1, "중개거래", "반포동", "나", 114.0, 300000),
+        ("11650", 2024, 2, None, "반포동", "나", 84.9, 250000),
+    ]
+    df = pd.DataFrame(rows, columns=["지역코드", "계약연도", "계약월", "거래유형", "법정동", "단지명", "전용면적", "거래금액"])
+    write_apt_trade(data_load._typed_trade(df))
+    build_cube(cube_dir=tmp_path / "trade_cube")
+    return TradeCube(tmp_path / "trade_cube")
+
+
+def test_query_filter_only(cube):
+    result = cube.query("거래금액", "count", 지역코드="11680")
+    assert result["거래금액_count"].tolist() == [3]    # 거래유형·단지명이 없는 거래도 포함
+
+    result = cube.query("거래금액", ["count", "max"], 지역코드="11680", 계약년월="202401")
+    assert result[["거래금액_count", "거래금액_max"]].values.tolist() == [[2, 210000]]
+
+    result = cube.query("거래금액", "count", 계약년월="202402")
+    assert result["거래금액_count"].tolist() == [2]
+
+
+def test_query_by_only(cube):
+    result = cube.query("거래금액", "count", by=["지역코드"])
+    assert result["거래금액_count"].to_dict() == {"11650": 2, "11680": 3}
+
+    result = cube.query("거래금액", "count", by=["계약년월"])
+    assert result["거래금액_count"].to_dict() == {"202401": 3, "202402": 2}
+
+
+def test_query_by_and_filter(cube):
+    result = cube.query("거래금액", "max", by=["계약년월"], 지역코드="11680")
+    assert result["거래금액_max"].to_dict() == {"202401": 210000, "202402": 150000}
+
+    result = cube.query("거래금액", "count", by=["면적대"], 계약년월="202401")
+    assert result["거래금액_count"].to_dict() == {"102~135": 1, "60~85": 2}
+
+
+def test_query_requires_by_or_filter(cube):
+    with pytest.raises(ValueError):
+        cube.query("거래금액", "count")
+
+
+def test_aggregate_keeps_missing_dims(cube):
+    agg = aggregate_apt_trade(by=["지역코드", "거래유형"], values=["거래금액"])
+    assert agg.result()["거래금액_count"].sum() == 5
+    assert agg.rollup(["지역코드"]).result()["거래금액_count"].to_dict() == {"11650": 2, "11680": 3}
+    assert agg.result()["거래금액_median"].notna().all()    # 누락 그룹도 분위수 추정
@@ -0,0 +1,73 @@
+import os
+import time
+
+import pandas as pd
+
+import utils.data_utils as data_utils
+from utils.aggregate import OUT_AGG, refresh_trade_aggregates
+from utils.data_load import OUT2, apt_trade_to_parquet
+from utils.data_utils import ResponseCache
+
+
+def _xml(*cancelled: str) -> bytes:
+    items = "".join(
+        f"<item><aptNm>{name}</aptNm><cdealDay>{'24.03.02' if name in cancelled else ' '}</cdealDay>"
+        f"<dealAmount>{amount:,}</dealAmount><dealDay>1</dealDay><dealMonth>1</dealMonth><dealYear>2020</dealYear>"
+        f"<dealingGbn>중개거래</dealingGbn><excluUseAr>84.9</excluUseAr><sggCd>11680</sggCd><umdNm>대치동</umdNm></item>"
+        for name, amount in [("가", 150000), ("나", 200000)]
+    )
+    return (
+        "<response><header><resultCode>000</resultCode><resultMsg>OK</resultMsg></header>"
+        f"<body><items>{items}</items><numOfRows>9999</numOfRows><pageNo>1</pageNo><totalCount>2</totalCount></body></response>"
+    ).encode()
+
+
+class _Session:
+    """실거래가 API 대신 `content`를 돌려주는 세션"""
+
+    def __init__(self) -> None:
+        self.content = b""
+        self.calls = 0
+
+    def get(self, url, params=None, timeout=None):
+        self.calls += 1
+        content = self.content
+
+        class _Response:
+            status_code = 200
+
+            def __init__(self):
+                self.content = content
+
+            def raise_for_status(self):
+                pass
+
+        return _Response()
+
+
+def test_cancelled_deal_in_old_month_leaves_aggregates(monkeypatch):
+    session = _Session()
+    monkeypatch.setattr(data_utils, "make_session", lambda *args, **kwargs: session)
+    OUT2.parent.mkdir(parents=True, exist_ok=True)
+    pd.DataFrame({"sido_sgg": ["11680"], "locatadd_nm": ["서울특별시 강남구"]}).to_csv(OUT2, index=False)
+
+    def trade_count() -> int:
+        apt_trade_to_parquet(["202001"])
+        refresh_trade_aggregates()
+        df = pd.read_parquet(OUT_AGG)
+        return int(df.loc[(df["지역코드"] == "11680") & (df["계약년월"] == "202001"), "거래금액_count"].sum())
+
+    session.content = _xml()
+    assert trade_count() == 2
+
+    # 몇 년 지난 달의 거래가 뒤늦게 해제됨: 확인 주기 전에는 캐시를 재사용
+    session.content = _xml("나")
+    assert trade_count() == 2
+    assert session.calls == 1
+
+    # 확인 주기가 지나면 다시 받아 해제된 거래가 집계에서 빠짐
+    cached = ResponseCache().path("getRTMSDataSvcAptTrade", "11680", "202001", 1, 9999)
+    expired = time.time() - ResponseCache().closed_ttl - 60
+    os.utime(cached, (expired, expired))
+    assert trade_count() == 1
+    assert session.calls == 2
@@ -0,0 +1,279 @@
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+from .config import OUT_DIR
+from .data_load import apt_trade_files, scan_apt_trade
+
+#####################################################################################
+# 파생 열: 이름 -> (필요한 원본 열, 계산식)
+AREA_BINS = [0, 60, 85, 102, 135, float("inf")]
+AREA_LABELS = ["~60", "60~85", "85~102", "102~135", "135~"]    # 전용면적(㎡) 규모 구분
+DERIVED = {
+    "면적당금액": (["거래금액", "전용면적"], lambda df: df["거래금액"] / df["전용면적"]),
+    "면적대": (["전용면적"], lambda df: pd.cut(df["전용면적"], AREA_BINS, labels=AREA_LABELS).astype("string")),
+}
+
+
+def _source_columns(by: list[str], values: list[str]) -> list[str]:
+    columns = []
+    for name in [*by, *values]:
+        for col in DERIVED[name][0] if name in DERIVED else [name]:
+            if col not in columns:
+                columns.append(col)
+    return columns
+
+
+def _with_derived(df: pd.DataFrame, names: list[str]) -> pd.DataFrame:
+    for name in names:
+        if name in DERIVED and name not in df:
+            df[name] = DERIVED[name][1](df)
+    return df
+
+
+#####################################################################################
+# 병합 가능한 부분 집계
+class Aggregate:
+    """그룹별 count/sum/min/max와 분위수 스케치를 담는 병합 가능한 부분 집계
+
+    DataFrame 조각을 `update`로 차례로 접어 넣고, 다른 파티션·프로세스에서 만든 부분 집계는
+    `merge`로 합친다. 상태 크기는 입력 행 수가 아니라 그룹 수(와 스케치 구간 수)에 비례한다.
+    분위수는 상대오차 `alpha` 이내의 로그 구간 히스토그램(DDSketch 방식)으로 추정하며 양수 값을 가정한다.
+    """
+
+    def __init__(self, by: list[str], values: list[str], alpha: float = 0.01) -> None:
+        self.by: list[str] = list(by)
+        self.values: list[str] = list(values)
+        self.alpha: float = alpha
+        self._gamma: float = (1 + alpha) / (1 - alpha)
+        self._log_gamma: float = math.log(self._gamma)
+        self.stats: pd.DataFrame = None     # index: by, columns: (value, count|sum|min|max)
+        self.sketch: pd.Series = None       # index: by + value + bucket, values: 건수
+
+    def update(self, df: pd.DataFrame) -> "Aggregate":
+        """DataFrame 조각을 집계에 반영"""
+        if df.empty:
+            return self
+        df = _with_derived(df, self.by + self.values)
+        stats = df.groupby(self.by, sort=False, dropna=False)[self.values].agg(["count", "sum", "min", "max"])
+
+        sketches = []
+        for value in self.values:
+            x = df[value].to_numpy(dtype="float64")
+            valid = ~np.isnan(x)
+            bucket = np.ceil(np.log(np.maximum(x[valid], 1e-9)) / self._log_gamma).astype("int32")
+            part = df.loc[valid, self.by].assign(value=value, bucket=bucket)
+            sketches.append(part.groupby(self.by + ["value", "bucket"], sort=False, dropna=False).size())
+        sketch = pd.concat(sketches)
+
+        return self._combine(stats, sketch)
+
+    def merge(self, other: "Aggregate") -> "Aggregate":
+        """다른 부분 집계를 합침"""
+        if other.stats is None:
+            return self
+        return self._combine(other.stats, other.sketch)
+
+    def rollup(self, by: list[str]) -> "Aggregate":
+        """그룹 열 일부(`by`)로 묶은 상위 집계"""
+        agg = Aggregate(by, self.values, alpha=self.alpha)
+        if self.stats is not None:
+            agg.stats = self.stats.groupby(level=by, sort=False, dropna=False).agg(self._how(self.stats))
+            agg.sketch = self.sketch.groupby(level=[*by, "value", "bucket"], sort=False, dropna=False).sum()
+        return agg
+
+    @staticmethod
+    def _how(stats: pd.DataFrame) -> dict:
+        return {(value, stat): "sum" if stat in ("count", "sum") else stat for value, stat in stats.columns}
+
+    def _combine(self, stats: pd.DataFrame, sketch: pd.Series) -> "Aggregate":
+        if self.stats is None:
+            self.stats, self.sketch = stats, sketch    # 그룹 키가 이미 유일
+            return self
+        stats = pd.concat([self.stats, stats])
+        sketch = pd.concat([self.sketch, sketch])
+        self.stats = stats.groupby(level=self.by, sort=False, dropna=False).agg(self._how(stats))
+        self.sketch = sketch.groupby(level=list(range(sketch.index.nlevels)), sort=False, dropna=False).sum()
+        return self
+
+    def quantile(self, q: float) -> pd.DataFrame:
+        """그룹별 분위수 추정값(열: value)"""
+        index = self.sketch.index
+        group_codes = [np.asarray(codes) for codes in index.codes[:-1]]    # bucket을 뺀 그룹 키
+        bucket = index.get_level_values("bucket").to_numpy()
+        order = np.lexsort([bucket, *group_codes[::-1]])    # 그룹별로 bucket 오름차순
+        counts = self.sketch.to_numpy()[order]
+        codes = np.stack([codes[order] for codes in group_codes])
+
+        f_start = np.ones(len(order), dtype=bool)
+        f_start[1:] = (codes[:, 1:] != codes[:, :-1]).any(axis=0)
+        starts = np.flatnonzero(f_start)
+        sizes = np.diff(np.append(starts, len(order)))
+        cum = np.cumsum(counts)
+        within = cum - np.repeat(np.append(0, cum[starts[1:] - 1]), sizes)    # 그룹 내 누적 건수
+        totals = np.repeat(np.add.reduceat(counts, starts), sizes)
+
+        hits = np.flatnonzero(within > q * (totals - 1))
+        group_id = np.cumsum(f_start)[hits]
+        first = hits[np.append(True, group_id[1:] != group_id[:-1])]    # 그룹별 첫 구간
+        estimate = 2 * self._gamma ** bucket[order][first].astype("float64") / (self._gamma + 1)
+        return pd.Series(estimate, index=index[order[first]].droplevel("bucket")).unstack("value")
+
+    def result(self, quantiles: tuple[float, ...] = (0.5,)) -> pd.DataFrame:
+        """집계 결과
+
+        Returns:
+            pd.DataFrame: 열 이름은 "{value}_{count|sum|min|max|mean|median|qNN}"
+        """
+        if self.stats is None:
+            return pd.DataFrame(columns=self.by).set_index(self.by)
+        frames = {}
+        for value in self.values:
+            stats = self.stats[value]
+            frames[f"{value}_count"] = stats["count"]
+            frames[f"{value}_sum"] = stats["sum"]
+            frames[f"{value}_min"] = stats["min"]
+            frames[f"{value}_max"] = stats["max"]
+            frames[f"{value}_mean"] = stats["sum"] / stats["count"]
+        for q in quantiles:
+            estimate = self.quantile(q).reindex(self.stats.index)    # 같은 인덱스로 맞춰 합집합 정렬을 피함
+            suffix = "median" if q == 0.5 else f"q{round(q * 100):02}"
+            for value in self.values:
+                frames[f"{value}_{suffix}"] = estimate[value]
+        return pd.DataFrame(frames).sort_index()
+
+
+#####################################################################################
+# 실거래가 집계
+def _aggregate_files(files: list[str], by: list[str], values: list[str], alpha: float, batch_size: int) -> Aggregate:
+    agg = Aggregate(by, values, alpha=alpha)
+    for chunk in scan_apt_trade(files=files, columns=_source_columns(by, values), batch_size=batch_size):
+        agg.update(chunk)
+    return agg
+
+
+def aggregate_apt_trade(
+    by: list[str],
+    values: list[str],
+    sgg_cd: str | list[str] = None,
+    deal_ym: str | list[str] = None,
+    workers: int = 1,
+    alpha: float = 0.01,
+    batch_size: int = 64 * 1024,
+) -> Aggregate:
+    """실거래가 파티션을 조각 단위로 읽으며 집계(일정한 메모리, 파티션별 병렬 처리)
+
+    Args:
+        by (list[str]): 그룹 열
+        values (list[str]): 집계할 열(`by`, `values` 모두 `DERIVED`의 파생 열 사용 가능)
+        sgg_cd (str | list[str], optional): 지역코드. Defaults to None(전체).
+        deal_ym (str | list[str], optional): 계약년월(YYYYMM). Defaults to None(전체).
+        workers (int, optional): 작업 프로세스 수. Defaults to 1.
+        alpha (float, optional): 분위수 스케치의 상대오차. Defaults to 0.01.
+        batch_size (int, optional): 한 번에 읽을 최대 행 수. Defaults to 65536.
+
+    Returns:
+        Aggregate: 병합된 집계
+    """
+    files = apt_trade_files(sgg_cd, deal_ym)
+    if workers <= 1:
+        return _aggregate_files(files, by, values, alpha, batch_size)
+
+    shards = [files[i::workers] for i in range(workers)]
+    result = Aggregate(by, values, alpha=alpha)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_aggregate_files, shard, by, values, alpha, batch_size) for shard in shards if shard]
+        for future in futures:
+            result.merge(future.result())
+    return result
+
+
+#####################################################################################
+# 지역×월 집계 저장소(증분 갱신)
+OUT_AGG = OUT_DIR / "trade_agg.parquet"
+AGG_VALUES = ["전용면적", "면적당금액", "거래금액"]
+
+
+def _partition_key(path: str) -> tuple[str, str]:
+    """".../지역코드=11680/계약년월=202401/part-0.parquet" -> ("11680", "202401")"""
+    month_dir = Path(path).parent
+    return month_dir.parent.name.split("=", 1)[1], month_dir.name.split("=", 1)[1]
+
+
+def _fingerprint(path: str) -> str:
+    stat = os.stat(path)
+    return f"{stat.st_size}-{stat.st_mtime_ns}"
+
+
+def _aggregate_partition(path: str) -> pd.DataFrame:
+    """파티션 하나를 (지역코드, 계약년월) 한 행의 집계로 변환"""
+    agg = _aggregate_files([path], ["지역코드", "계약년월"], AGG_VALUES, alpha=0.01, batch_size=64 * 1024)
+    if agg.stats is None:
+        return pd.DataFrame()
+    df = agg.stats.copy()
+    df.columns = [f"{value}_{stat}" for value, stat in df.columns]
+    df["source"] = _fingerprint(path)
+    return df.reset_index()
+
+
+def read_trade_aggregates() -> pd.DataFrame:
+    """지역×월 집계 저장소 조회"""
+    if not OUT_AGG.exists():
+        return pd.DataFrame(columns=["지역코드", "계약년월", "source"])
+    return pd.read_parquet(OUT_AGG)
+
+
+def _in_scope(df: pd.DataFrame, sgg_cd: str | list[str] = None, deal_ym: str | list[str] = None) -> pd.Series:
+    """지역코드·계약년월 조건에 맞는 행(None이면 전체)"""
+    f_scope = pd.Series(True, index=df.index)
+    if sgg_cd is not None:
+        f_scope &= df["지역코드"].isin([sgg_cd] if isinstance(sgg_cd, str) else sgg_cd)
+    if deal_ym is not None:
+        f_scope &= df["계약년월"].isin([deal_ym] if isinstance(deal_ym, str) else deal_ym)
+    return f_scope
+
+
+def refresh_trade_aggregates(sgg_cd: str | list[str] = None, deal_ym: str | list[str] = None, workers: int = 1) -> pd.DataFrame:
+    """새로 들어오거나 바뀐 실거래가 파티션만 다시 집계해 저장소에 반영
+
+    파티션은 (지역코드, 계약년월) 단위로 통째로 교체되므로, 나중에 해제(cdealDay)된 거래가 빠진 채
+    다시 수집된 달은 그 달만 재집계되어 집계에서 제외된다(최소·최대값은 뺄 수 없으므로 재집계).
+    지난 달의 해제도 응답 캐시가 `ResponseCache.closed_ttl`마다 만료되어 다시 수집할 때 반영된다.
+    사라진 파티션의 집계는 삭제한다. 조건 밖의 파티션 집계는 그대로 둔다.
+
+    Args:
+        sgg_cd (str | list[str], optional): 지역코드. Defaults to None(전체).
+        deal_ym (str | list[str], optional): 계약년월(YYYYMM). Defaults to None(전체).
+        workers (int, optional): 작업 프로세스 수. Defaults to 1.
+
+    Returns:
+        pd.DataFrame: 조건에 맞는 지역×월 집계
+    """
+    store = read_trade_aggregates()
+    scoped = store.loc[_in_scope(store, sgg_cd, deal_ym)]
+    known = dict(zip(zip(scoped["지역코드"], scoped["계약년월"]), scoped["source"]))
+    current = {_partition_key(path): path for path in apt_trade_files(sgg_cd, deal_ym)}
+    changed = [path for key, path in current.items() if known.get(key) != _fingerprint(path)]
+    stale = {key for key in known if key not in current} | {_partition_key(path) for path in changed}
+    if not changed and not stale:
+        return scoped.reset_index(drop=True)
+
+    if workers <= 1:
+        parts = [_aggregate_partition(path) for path in changed]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            parts = list(executor.map(_aggregate_partition, changed))
+
+    f_keep = [key not in stale for key in zip(store["지역코드"], store["계약년월"])]
+    frames = [frame for frame in [store.loc[f_keep], *parts] if not frame.empty]
+    df = pd.concat(frames, ignore_index=True) if frames else read_trade_aggregates()
+    df = df.sort_values(["지역코드", "계약년월"], ignore_index=True)
+
+    tmp = OUT_AGG.with_suffix(".tmp")
+    df.to_parquet(tmp, index=False)
+    os.replace(tmp, OUT_AGG)
+    return df.loc[_in_scope(df, sgg_cd, deal_ym)].reset_index(drop=True)
@@ -0,0 +1,13 @@
+"""경로·접속 설정(표준 라이브러리만 사용)
+
+앱, 조회 API, CLI가 경로만 필요할 때 API 클라이언트(requests, pyarrow 등)를 불러오지 않도록 분리했다.
+"""
+import os
+from pathlib import Path
+
+WORK_DIR = Path(__file__).parent.parent
+IN_DIR, OUT_DIR = WORK_DIR / "input", Path(os.getenv("DATA_OUT_DIR") or WORK_DIR / "output")    # 벤치마크 등은 별도 작업 디렉터리
+DATAGO_URL = os.getenv("DATAGO_URL", "http://apis.data.go.kr")    # 로컬 대체 서버로 바꿀 수 있음
+SGIS_URL = os.getenv("SGIS_URL", "https://sgisapi.kostat.go.kr")
+BOUNDARY_YEAR = os.getenv("BOUNDARY_YEAR", "2023")    # SGIS 경계 기준연도(제공되는 최신 연도)
+CACHE_DIR = OUT_DIR / "cache"
@@ -0,0 +1,138 @@
+from itertools import combinations
+from pathlib import Path
+import os
+
+import pandas as pd
+
+from .config import OUT_DIR
+
+#####################################################################################
+# 실거래가 집계 큐브
+OUT_CUBE = OUT_DIR / "trade_cube"
+GEO_LEVELS = [[], ["지역코드"], ["지역코드", "법정동"], ["지역코드", "법정동", "단지명"]]    # 상위 지역을 항상 포함
+OTHER_DIMS = ["계약년월", "면적대", "거래유형"]
+CUBE_DIMS = GEO_LEVELS[-1] + OTHER_DIMS
+CUBE_VALUES = ["면적당금액", "거래금액", "전용면적"]
+CUBE_STATS = ["count", "mean", "median", "max"]
+
+
+def cuboids() -> list[list[str]]:
+    """미리 계산할 차원 조합(지역 계층 × 나머지 차원의 부분집합, 빈 조합 제외)"""
+    result = []
+    for geo in GEO_LEVELS:
+        for n in range(len(OTHER_DIMS) + 1):
+            for other in combinations(OTHER_DIMS, n):
+                if geo or other:
+                    result.append([*geo, *other])
+    return result
+
+
+def _cuboid_path(dims: list[str], cube_dir: Path = OUT_CUBE) -> Path:
+    return Path(cube_dir) / f"{'+'.join(dims)}.parquet"
+
+
+def build_cube(
+    sgg_cd: str | list[str] = None,
+    deal_ym: str | list[str] = None,
+    workers: int = 1,
+    cube_dir: Path = OUT_CUBE,
+) -> None:
+    """최하위 (지역코드, 법정동, 단지명, 계약년월, 면적대, 거래유형) 집계를 한 번 만들고
+    모든 차원 조합으로 묶어 `cube_dir`에 저장
+
+    Args:
+        sgg_cd (str | list[str], optional): 지역코드. Defaults to None(전체).
+        deal_ym (str | list[str], optional): 계약년월(YYYYMM). Defaults to None(전체).
+        workers (int, optional): 작업 프로세스 수. Defaults to 1.
+        cube_dir (Path, optional): 저장 위치. Defaults to OUT_CUBE.
+    """
+    from .aggregate import aggregate_apt_trade    # 조회만 할 때는 수집·집계 모듈을 불러오지 않음
+
+    leaf = aggregate_apt_trade(by=CUBE_DIMS, values=CUBE_VALUES, sgg_cd=sgg_cd, deal_ym=deal_ym, workers=workers)
+    cube_dir = Path(cube_dir)
+    cube_dir.mkdir(parents=True, exist_ok=True)
+    for dims in cuboids():
+        df = leaf.rollup(dims).result(quantiles=(0.5,))
+        df = df.filter([f"{value}_{stat}" for value in CUBE_VALUES for stat in CUBE_STATS])
+        path = _cuboid_path(dims, cube_dir)
+        tmp = path.with_suffix(".tmp")
+        df.reset_index().to_parquet(tmp, index=False)
+        os.replace(tmp, path)
+
+
+class TradeCube:
+    """미리 계산한 집계 큐브 조회
+
+    Example:
+        >>> cube = TradeCube()
+        >>> cube.query("면적당금액", "median", by=["계약년월"], 지역코드="11680", 면적대="60~85")
+    """
+
+    def __init__(self, cube_dir: Path = OUT_CUBE) -> None:
+        self.cube_dir: Path = Path(cube_dir)
+        self._cuboids: dict[tuple[str, ...], pd.DataFrame] = {}
+        self._layouts: dict[tuple[tuple[str, ...], tuple[str, ...]], tuple] = {}
+
+    @staticmethod
+    def dims_for(names: list[str]) -> list[str]:
+        """조회에 필요한 차원(상위 지역 포함, CUBE_DIMS 순서)"""
+        names = set(names)
+        for geo in GEO_LEVELS[::-1]:
+            if geo and geo[-1] in names:
+                names.update(geo)
+                break
+        unknown = names - set(CUBE_DIMS)
+        if unknown:
+            raise ValueError(f"invalid dims, got {sorted(unknown)!r}")
+        return [dim for dim in CUBE_DIMS if dim in names]
+
+    def cuboid(self, dims: list[str]) -> pd.DataFrame:
+        key = tuple(dims)
+        if key not in self._cuboids:
+            self._cuboids[key] = pd.read_parquet(_cuboid_path(dims, self.cube_dir), memory_map=True)
+        return self._cuboids[key]
+
+    def _layout(self, filter_dims: tuple[str, ...], dims: tuple[str, ...]) -> tuple[pd.Index, pd.Index, dict]:
+        """필터 차원을 앞에 둔 정렬된 인덱스와 열 배열(조회 형태별로 한 번만 생성)"""
+        key = (filter_dims, dims)
+        if key not in self._layouts:
+            rest = [dim for dim in dims if dim not in filter_dims]
+            df = self.cuboid(list(dims)).set_index([*filter_dims, *rest]).sort_index()
+            rest_index = df.index.droplevel(list(filter_dims)) if filter_dims and rest else df.index
+            arrays = {col: df[col].to_numpy() for col in df.columns}
+            self._layouts[key] = (df.index, rest_index, arrays)
+        return self._layouts[key]
+
+    def query(
+        self,
+        value: str = "면적당금액",
+        stats: str | list[str] = "median",
+        by: list[str] = None,
+        **filters: str,
+    ) -> pd.DataFrame:
+        """큐브 조회(원본 실거래가를 다시 읽지 않음)
+
+        Args:
+            value (str, optional): 집계 값(CUBE_VALUES). Defaults to "면적당금액".
+            stats (str | list[str], optional): 통계(CUBE_STATS). Defaults to "median".
+            by (list[str], optional): 결과를 나눌 차원. Defaults to None.
+            **filters (str): 차원별 조건(예: 지역코드="11680", 면적대="60~85")
+
+        Returns:
+            pd.DataFrame: `by`(와 필요한 상위 지역)를 인덱스로 하는 통계
+        """
+        if not by and not filters:
+            raise ValueError("by or a filter is required")    # 전체 합계 조합은 미리 계산하지 않음
+        stats = [stats] if isinstance(stats, str) else list(stats)
+        columns = [f"{value}_{stat}" for stat in stats]
+        filter_dims = tuple(dim for dim in CUBE_DIMS if dim in filters)
+        dims = tuple(self.dims_for([*(by or []), *filters]))
+        index, rest_index, arrays = self._layout(filter_dims, dims)
+
+        start, stop = 0, len(index)
+        if filter_dims:
+            key = tuple(filters[dim] for dim in filter_dims)
+            if not isinstance(index, pd.MultiIndex):
+                key = key[0]    # 차원이 하나면 일반 Index(튜플이 아닌 값으로 탐색)
+            start, stop = index.slice_locs(key, key)    # 정렬된 인덱스에서 이진 탐색
+        return pd.DataFrame({col: arrays[col][start:stop] for col in columns}, index=rest_index[start:stop])
@@ -1,11 +1,22 @@
 from pathlib import Path
 from dotenv import load_dotenv
+import logging
 import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Iterator
 import pandas as pd
+import requests
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
 from tqdm import tqdm
-import geopandas as gpd
 
-from .data_utils import OUT_DIR, Datagokr, Sgis
+from .config import BOUNDARY_YEAR, OUT_DIR
+from .data_utils import BoundaryStore, Datagokr, GeocodeCache, ResponseCache, Sgis, bounded_map
+from .metrics import METRICS
+
+logger = logging.getLogger(__name__)
 
 #############################################################
 # 법정동 데이터
@@ -13,9 +24,10 @@ OUT2 = OUT_DIR / "region_code.csv"
 load_dotenv()
 DATAGO_KEY = os.getenv("DATAGO_KEY")
 
-def sido_sgg_to_csv(region:str = None):
+def sido_sgg_to_csv(region: str | list[str] = None):
     datago = Datagokr(DATAGO_KEY)
-    resp = datago.lawd_code(region)
+    regions = [region] if region is None or isinstance(region, str) else region
+    resp = [row for name in regions for row in datago.lawd_code(name)]
     df = pd.DataFrame(resp)
     df["sido_sgg"] = df['sido_cd'] + df['sgg_cd']
 
@@ -33,46 +45,296 @@ def sido_sgg_to_csv(region:str = None):
 
 #####################################################################################
 # 아파트 매매 실거래가 데이터
-OUT3 = OUT_DIR / "apt_trade.csv"
-def apt_trade_to_csv():
+OUT3 = OUT_DIR / "apt_trade.csv"    # 이전 형식(CSV)
+OUT3_DIR = OUT_DIR / "apt_trade"    # 지역코드/계약년월 단위로 분할된 Parquet
+TRADE_SCHEMA = pa.schema([
+    ("지역코드", pa.string()),
+    ("계약연도", pa.int16()),
+    ("계약월", pa.int8()),
+    ("거래유형", pa.string()),
+    ("법정동", pa.string()),
+    ("단지명", pa.string()),
+    ("전용면적", pa.float64()),
+    ("거래금액", pa.int64()),    # 만원
+    ("계약년월", pa.string()),
+])
+TRADE_PARTITIONING = ds.partitioning(
+    pa.schema([("지역코드", pa.string()), ("계약년월", pa.string())]), flavor="hive"
+)
+
+def _typed_trade(df: pd.DataFrame) -> pd.DataFrame:
+    """수집한 실거래가의 문자열 값을 한 번만 숫자로 변환"""
+    df = df.astype({"지역코드": "string", "계약연도": "int16", "계약월": "int8"})
+    df["거래금액"] = df["거래금액"].astype("string").str.replace(",", "").str.strip().astype("int64")    # 콤마 제거
+    df["전용면적"] = df["전용면적"].astype("float64")
+    df["계약년월"] = df["계약연도"].astype("string") + df["계약월"].astype("string").str.zfill(2)
+    return df
+
+def apt_trade_partition(sgg_cd: str, deal_ym: str) -> Path:
+    return OUT3_DIR / f"지역코드={sgg_cd}" / f"계약년월={deal_ym}" / "part-0.parquet"
+
+def write_apt_trade(df: pd.DataFrame) -> list[tuple[str, str]]:
+    """실거래가를 지역코드/계약년월 단위 Parquet 파티션으로 저장
+
+    내용이 같은 파티션은 다시 쓰지 않아 수정 시각이 유지된다(증분 집계가 변경분만 처리하도록).
+
+    Returns:
+        list[tuple[str, str]]: 새로 쓰거나 교체한 (지역코드, 계약년월)
+    """
+    written = []
+    file_schema = pa.schema([field for field in TRADE_SCHEMA if field.name not in ("지역코드", "계약년월")])
+    for (sgg_cd, deal_ym), df_part in df.groupby(["지역코드", "계약년월"], sort=False):
+        table = pa.Table.from_pandas(df_part[file_schema.names], schema=file_schema, preserve_index=False)
+        path = apt_trade_partition(sgg_cd, deal_ym)
+        if path.exists() and pq.read_table(path, schema=file_schema).equals(table):
+            continue    # 변경 없음
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        pq.write_table(table, tmp)
+        os.replace(tmp, path)
+        written.append((sgg_cd, deal_ym))
+    return written
+
+def apt_trade_files(sgg_cd: str | list[str] = None, deal_ym: str | list[str] = None) -> list[str]:
+    """조건에 맞는 파티션 파일 목록(전체 파일 목록을 훑지 않고 해당 디렉터리만 조회)"""
+    if not OUT3_DIR.exists() and OUT3.exists():
+        apt_trade_csv_to_parquet()    # 이전 형식에서 한 번만 변환
+
+    codes = [sgg_cd] if isinstance(sgg_cd, str) else ["*"] if sgg_cd is None else sgg_cd    # 빈 목록은 파일 없음
+    months = [deal_ym] if isinstance(deal_ym, str) else ["*"] if deal_ym is None else deal_ym
+    return [
+        str(path)
+        for code in codes
+        for yyyymm in months
+        for path in sorted(OUT3_DIR.glob(f"지역코드={code}/계약년월={yyyymm}/*.parquet"))
+    ]
+
+def _trade_dataset(files: list[str]) -> ds.Dataset:
+    return ds.dataset(
+        files,
+        schema=TRADE_SCHEMA,
+        format="parquet",
+        partitioning=TRADE_PARTITIONING,
+        partition_base_dir=str(OUT3_DIR),
+    )
+
+def read_apt_trade(
+    sgg_cd: str | list[str] = None,
+    deal_ym: str | list[str] = None,
+    columns: list[str] = None,
+) -> pd.DataFrame:
+    """Parquet 파티션에서 실거래가 조회
+
+    Args:
+        sgg_cd (str | list[str], optional): 지역코드. Defaults to None(전체).
+        deal_ym (str | list[str], optional): 계약년월(YYYYMM). Defaults to None(전체).
+        columns (list[str], optional): 읽을 열. Defaults to None(전체).
+
+    Returns:
+        pd.DataFrame: 실거래가
+    """
+    files = apt_trade_files(sgg_cd, deal_ym)
+    if not files:
+        table = TRADE_SCHEMA.empty_table()
+        return table.select(columns).to_pandas() if columns else table.to_pandas()
+    return _trade_dataset(files).to_table(columns=columns).to_pandas()
+
+def scan_apt_trade(
+    sgg_cd: str | list[str] = None,
+    deal_ym: str | list[str] = None,
+    columns: list[str] = None,
+    batch_size: int = 64 * 1024,
+    files: list[str] = None,
+) -> Iterator[pd.DataFrame]:
+    """실거래가를 약 `batch_size`행씩 DataFrame으로 나눠 순차 조회(메모리 사용량 일정)
+
+    Args:
+        sgg_cd (str | list[str], optional): 지역코드. Defaults to None(전체).
+        deal_ym (str | list[str], optional): 계약년월(YYYYMM). Defaults to None(전체).
+        columns (list[str], optional): 읽을 열. Defaults to None(전체).
+        batch_size (int, optional): 한 번에 읽을 최대 행 수. Defaults to 65536.
+        files (list[str], optional): 읽을 파티션 파일. 주어지면 sgg_cd, deal_ym은 무시. Defaults to None.
+
+    Yields:
+        pd.DataFrame: 실거래가 일부
+    """
+    files = apt_trade_files(sgg_cd, deal_ym) if files is None else files
+    if not files:
+        return
+    pending, n_rows = [], 0
+    for batch in _trade_dataset(files).to_batches(columns=columns, batch_size=batch_size):
+        pending.append(batch)    # 작은 파티션은 모아서 한 조각으로
+        n_rows += batch.num_rows
+        if n_rows >= batch_size:
+            yield pa.Table.from_batches(pending).to_pandas()
+            pending, n_rows = [], 0
+    if n_rows:
+        yield pa.Table.from_batches(pending).to_pandas()
+
+TRADE_FIELDS = {
+    "sggCd": "지역코드",
+    "dealYear": "계약연도",
+    "dealMonth": "계약월",
+    "dealingGbn": "거래유형",
+    "umdNm": "법정동",
+    "aptNm": "단지명",
+    "excluUseAr": "전용면적",
+    "dealAmount": "거래금액",
+}
+
+def _trade_frame(table: pa.Table) -> pd.DataFrame:
+    """API 응답 표(APT_TRADE_SCHEMA) -> 취소되지 않은 거래만 남긴 실거래가(형식 변환은 파싱에서 끝남)"""
+    table = table.filter(pc.is_null(table["cdealDay"]))    # 취소되지 않은 데이터
+    table = table.select(list(TRADE_FIELDS)).rename_columns(list(TRADE_FIELDS.values()))
+    deal_ym = pc.binary_join_element_wise(
+        pc.cast(table["계약연도"], pa.string()),
+        pc.utf8_lpad(pc.cast(table["계약월"], pa.string()), 2, "0"),
+        "",
+    )
+    table = table.append_column("계약년월", deal_ym)
+    return table.to_pandas(types_mapper={pa.string(): pd.StringDtype()}.get)
+
+def month_range(start: str, end: str) -> list[str]:
+    """시작·끝 계약년월 사이의 모든 달("202301", "202412" -> ["202301", ..., "202412"])"""
+    year, month = int(start[:4]), int(start[4:6])
+    result = []
+    while f"{year}{month:02}" <= end:
+        result.append(f"{year}{month:02}")
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return result
+
+def apt_trade_to_parquet(yyyymm_range: list[str] = None, workers: int = 1, use_cache: bool = True):
+    """아파트 매매 실거래가 수집(지역코드·계약년월 단위로 받는 즉시 저장)
+
+    Args:
+        yyyymm_range (list[str], optional): 계약년월 목록. Defaults to None(2024년 1~12월).
+        workers (int, optional): 동시 요청 스레드 수. 호출 한도는 모든 스레드가 공유. Defaults to 1.
+        use_cache (bool, optional): 응답 캐시 사용 여부. 중단 후 재실행 시 받지 못했거나 만료된 페이지만 요청. Defaults to True.
+    """
     df_addr = pd.read_csv(OUT2, dtype="string")
     addr_list = df_addr.values.tolist()
-    datagokr = Datagokr(DATAGO_KEY)
-    yyyymm_range = [f"2024{m:02}" for m in range(1, 13)]    # 계약년월
-    result = []
-    with tqdm(total=len(addr_list)) as pbar:    # tqdm: 진행표시줄
-        for code, addr in addr_list:
-            for yyyymm in yyyymm_range:
-                pbar.set_description(f"[{addr:20}[{code}{yyyymm}]]")
-                resp = datagokr.apt_trade(code, yyyymm)   # 실거래가 조회
-                result += resp
+    cache = ResponseCache() if use_cache else None
+    datagokr = Datagokr(DATAGO_KEY, pool_size=workers, cache=cache)   # 스레드마다 연결 하나씩 재사용
+    yyyymm_range = yyyymm_range or month_range("202401", "202412")    # 계약년월
+    partitions = [(code, addr, yyyymm) for code, addr in addr_list for yyyymm in yyyymm_range]
+
+    def _fetch(partition: tuple[str, str, str]) -> pa.Table:
+        code, _, yyyymm = partition
+        return datagokr.apt_trade_table(code, yyyymm)   # 실거래가 조회
+
+    with tqdm(total=len(partitions)) as pbar:    # tqdm: 진행표시줄
+        # 저장이 밀리면 요청도 멈춰, 받아 둔 응답은 최대 workers * 2개
+        for (code, addr, yyyymm), table in bounded_map(_fetch, partitions, workers=workers):
+            with METRICS.span("transform", stage="apt_trade"):
+                df_real = _trade_frame(table)
+            with METRICS.span("write", stage="apt_trade"):
+                if df_real.empty:
+                    apt_trade_partition(code, yyyymm).unlink(missing_ok=True)    # 모두 해제된 달
+                else:
+                    write_apt_trade(df_real)    # 파티션 단위라 직렬 수집과 결과가 같음
+            pbar.set_description(f"[{addr:20}[{code}{yyyymm}]]")
             pbar.update()
-    
-    df = pd.DataFrame(result)
-    df_filter = df.filter(["sggCd", "dealYear", "dealMonth", "dealingGbn", "umdNm", "aptNm", "excluUseAr", "dealAmount", "cdealDay"])
-    df_filter.columns = ["지역코드", "계약연도", "계약월", "거래유형", "법정동", "단지명", "전용면적", "거래금액", "해제사유발생일"]
-    f_is_real_deal = df_filter["해제사유발생일"].isna()
-    df_real = df_filter.loc[f_is_real_deal]    # 취소되지 않은 데이터
 
-    df_real = df_real.drop(columns=["해제사유발생일"])
-    df_real.to_csv(OUT3, index=False)
+def apt_trade_csv_to_parquet():
+    """이전 형식의 apt_trade.csv를 Parquet 파티션으로 변환"""
+    df = pd.read_csv(OUT3, dtype="string")
+    write_apt_trade(_typed_trade(df))
 
 
 #####################################################################################
 # 행정구역 경계 데이터
-OUT4 = OUT_DIR / "geo_data.geojson"
-def adm_cd_to_geojson(adm_cd: str = None, low_search: str = "1")->None:
+OUT4 = OUT_DIR / "geo_data.geojson"    # 시군구
+OUT4_DONG = OUT_DIR / "geo_data_dong.geojson"    # 읍면동
+def adm_cd_to_geojson(adm_cd: str = None, low_search: str = "1", path: Path = None, year: str = BOUNDARY_YEAR, use_cache: bool = True) -> dict[str, list]:
+    """행정구역 경계 저장(경계 저장소에서 바뀐 행정구역만 갱신하고, 내용이 같으면 파일을 다시 쓰지 않음)
+
+    Args:
+        adm_cd (str, optional): 상위 행정구역코드. Defaults to None(전국).
+        low_search (str, optional): 하위 단계("1": 시군구, "2": 읍면동). Defaults to "1".
+        path (Path, optional): 저장 위치. Defaults to None(OUT4 또는 OUT4_DONG).
+        year (str, optional): 기준연도. Defaults to BOUNDARY_YEAR.
+        use_cache (bool, optional): 지난 연도이거나 최근에 받은 경계는 API를 호출하지 않음. Defaults to True.
+
+    Returns:
+        dict[str, list]: `BoundaryStore.update`의 바뀐 내용(받지 않았으면 빈 목록)
+    """
+    path = path or (OUT4_DONG if low_search == "2" else OUT4)
+    store = BoundaryStore()
+    changes = {"added": [], "removed": [], "renamed": [], "changed": []}
+    if not (use_cache and store.is_fresh(adm_cd, low_search, year)):
+        SGIS_ID = os.getenv("SGIS_ID")
+        SGIS_KEY = os.getenv("SGIS_KEY")
+        sgis = Sgis(SGIS_ID, SGIS_KEY)  # Sgis 객체 생성
+        resp: str = sgis.hadm_area(adm_cd=adm_cd, low_search=low_search, year=year)  # GeoJSON 형식의 문자열 반환
+        changes = store.update(adm_cd, low_search, year, resp)
+
+    # 가격은 이름(adm_nm)으로 조인하므로 코드·이름이 바뀌면 빠지는 지역이 생김
+    for key in ("added", "removed", "renamed"):
+        if changes[key]:
+            logger.warning(f"boundary {key} ({adm_cd}, {year}): {changes[key]}")
+    if changes["changed"]:
+        logger.info(f"boundary changed ({adm_cd}, {year}): {changes['changed']}")
+
+    geojson = store.geojson(adm_cd, low_search, year)
+    if not path.exists() or path.read_text(encoding="utf-8") != geojson:
+        path.write_text(geojson, encoding="utf-8")  # GeoJSON 형식의 텍스트 파일로 저장
+    return changes
+
+
+#####################################################################################
+# 아파트 단지 좌표
+OUT8 = OUT_DIR / "complex_geo.csv"
+def _geocode(sgis: Sgis, address: str) -> tuple[float, float] | None:
+    resp = sgis.geocode_wgs84(address, limit=1)
+    if not resp:
+        return None
+    return float(resp[0]["x"]), float(resp[0]["y"])
+
+def complex_to_geocode(workers: int = 4):
+    """실거래가의 (법정동, 단지명)을 중복 없이 좌표로 변환(이미 찾은 단지는 캐시에서 재사용)
+
+    Args:
+        workers (int, optional): 동시 요청 스레드 수. 호출 한도는 모든 스레드가 공유. Defaults to 4.
+    """
+    df_complex = read_apt_trade(columns=["지역코드", "법정동", "단지명"]).drop_duplicates(ignore_index=True)
+    df_addr = pd.read_csv(OUT2, dtype="string")
+    df = pd.merge(df_complex, df_addr, left_on="지역코드", right_on="sido_sgg", how="inner")
+    df["주소"] = df["locatadd_nm"] + " " + df["법정동"] + " " + df["단지명"]
+
+    cache = GeocodeCache()
+    addresses = df["주소"].unique().tolist()
+    found = cache.get_many(addresses)
+    todo = [address for address in addresses if address not in found]
+
     SGIS_ID = os.getenv("SGIS_ID")
     SGIS_KEY = os.getenv("SGIS_KEY")
-    sgis = Sgis(SGIS_ID, SGIS_KEY)  # Sgis 객체 생성
-    resp: str = sgis.hadm_area(adm_cd=adm_cd, low_search=low_search)  # GeoJSON 형식의 문자열 반환
-    gdf_resp : gpd.GeoDataFrame = gpd.read_file(resp)
-    gdf_resp.plot()
-    OUT4.write_text(resp, encoding="utf-8")  # GeoJSON 형식의 텍스트 파일로 저장
+    sgis = Sgis(SGIS_ID, SGIS_KEY, pool_size=workers)
+    if todo:
+        sgis.auth()    # 스레드마다 인증하지 않도록 미리 발급
+    with tqdm(total=len(todo)) as pbar, ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(_geocode, sgis, address): address for address in todo}
+        for future in as_completed(futures):
+            address = futures[future]
+            try:
+                xy = future.result()
+            except (ValueError, requests.RequestException) as err:    # 재시도 후에도 실패한 주소는 기록하지 않고 다음 실행에서 다시 시도
+                logger.warning(f"{address}: {err}")
+            else:
+                cache.put(address, xy)    # 찾을 때마다 저장(중단되어도 유지)
+                found[address] = xy
+            pbar.update()
+
+    xy = [found.get(address) for address in df["주소"]]    # 실패한 주소는 found에 없음
+    df["x"] = [v[0] if isinstance(v, tuple) else None for v in xy]    # 경도
+    df["y"] = [v[1] if isinstance(v, tuple) else None for v in xy]    # 위도
+    df_filter = df.filter(["지역코드", "법정동", "단지명", "x", "y"])
+    df_filter.to_csv(OUT8, index=False)
 
 
 if __name__ == "__main__":
     from data_utils import OUT_DIR, Datagokr, Sgis
     # sido_sgg_to_csv(region="서울특별시")
-    # apt_trade_to_csv()
-    adm_cd_to_geojson("11", "1")    # 서울특별시, 시군구 단위
\ No newline at end of file
+    # apt_trade_to_parquet()
+    adm_cd_to_geojson("11", "1")    # 서울특별시, 시군구 단위
+    # adm_cd_to_geojson("11", "2")    # 서울특별시, 읍면동 단위
+    # complex_to_geocode()
\ No newline at end of file
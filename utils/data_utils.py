@@ -1,33 +1,385 @@
 from pathlib import Path
-from dotenv import load_dotenv
 import os
-import pandas as pd
-from tqdm import tqdm
 
 # datagokr
 # from __future__ import annotations
 
+import hashlib
 import json
 import logging
 from enum import Enum
 
+import io
+import re
+import xml.etree.ElementTree as ET
+
+import pyarrow as pa
+import pyarrow.compute as pc
 import requests
-import xmltodict
-from ratelimit import limits, sleep_and_retry
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import islice
+import asyncio
+import sqlite3
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # Sgis
 import pathlib
 import time
-from typing import Literal
+from datetime import date
+from typing import AsyncIterator, Callable, Iterable, Iterator, Literal, TypeVar
+
+from .config import BOUNDARY_YEAR, CACHE_DIR, DATAGO_URL, IN_DIR, OUT_DIR, SGIS_URL, WORK_DIR
+from .metrics import METRICS
+
+
+##################################################################################
+# 호출 제한
+class RateLimiter:
+    """토큰 버킷 방식의 호출 제한(여러 스레드가 하나의 한도를 공유)"""
+
+    def __init__(self, calls: int = 25, period: float = 1, name: str = "api") -> None:
+        self.calls: int = calls
+        self.period: float = period
+        self.name: str = name
+        self._rate: float = calls / period
+        self._tokens: float = float(calls)
+        self._updated: float = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """토큰 1개를 사용할 수 있을 때까지 대기
+
+        Returns:
+            float: 대기한 시간(초). 다른 스레드가 기다리는 동안 막힌 시간 포함
+        """
+        started = time.perf_counter()
+        with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.calls, self._tokens + (now - self._updated) * self._rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    break
+                time.sleep((1 - self._tokens) / self._rate)
+        waited = time.perf_counter() - started
+        METRICS.observe("ratelimit_wait", waited, limiter=self.name)
+        return waited
+
+
+##################################################################################
+# HTTP 세션
+class _CountingRetry(Retry):
+    """재시도할 때마다 `http_retries_total`을 올리는 Retry"""
+
+    def increment(self, method=None, url=None, response=None, error=None, *args, **kwargs):
+        reason = type(error).__name__ if error else f"{getattr(response, 'status', '')}"
+        METRICS.inc("http_retries_total", reason=reason)
+        return super().increment(method, url, response, error, *args, **kwargs)
+
+
+def make_session(pool_size: int = 10, retries: int = 3, backoff: float = 0.5) -> requests.Session:
+    """연결을 재사용하는(keep-alive) 세션 생성
+
+    Args:
+        pool_size (int, optional): 호스트별 연결 풀 크기. Defaults to 10.
+        retries (int, optional): 5xx·연결 오류·시간 초과 재시도 횟수. Defaults to 3.
+        backoff (float, optional): 지수 백오프 계수(초). Defaults to 0.5.
+
+    Returns:
+        requests.Session: 세션
+    """
+    retry = _CountingRetry(
+        total=retries,
+        backoff_factor=backoff,
+        status_forcelist=(500, 502, 503, 504),
+        allowed_methods=("GET",),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def bounded_map(fn: Callable[[T], R], items: Iterable[T], workers: int = 1, max_pending: int = None) -> Iterator[tuple[T, R]]:
+    """`items`를 `workers`개 스레드로 처리해 끝나는 순서대로 (item, 결과)를 반환
+
+    진행 중이거나 소비되지 않은 결과는 최대 `max_pending`개라서, 소비자(저장·집계)가 느리면
+    새 요청을 보내지 않고 기다린다(메모리 사용량이 전체 작업량과 무관).
+
+    Args:
+        fn (Callable[[T], R]): 작업 함수
+        items (Iterable[T]): 작업 목록(지연 평가 가능)
+        workers (int, optional): 스레드 수. Defaults to 1.
+        max_pending (int, optional): 동시에 들고 있는 최대 작업 수. Defaults to None(workers * 2).
+    """
+    max_pending = max_pending or workers * 2
+    items = iter(items)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = {executor.submit(fn, item): item for item in islice(items, max_pending)}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                item = pending.pop(future)
+                for item_next in islice(items, 1):    # 하나 끝나면 하나 더 요청
+                    pending[executor.submit(fn, item_next)] = item_next
+                yield item, future.result()
+
+
+##################################################################################
+# 응답 캐시
+class ResponseCache:
+    """(endpoint, LAWD_CD, DEAL_YMD, page) 단위 API 응답 디스크 캐시
+
+    신고 기한(계약일로부터 30일)이 지나지 않은 최근 `hot_months`개월은 `hot_ttl`초마다 다시 받는다.
+    그 이전 달도 거래 해제(cdealDay)는 나중에 신고될 수 있으므로 `closed_ttl`초마다 다시 받아 확인한다.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path = CACHE_DIR,
+        hot_months: int = 2,
+        hot_ttl: float = 24 * 60 * 60,
+        closed_ttl: float | None = 30 * 24 * 60 * 60,
+    ) -> None:
+        self.cache_dir: Path = Path(cache_dir)
+        self.hot_months: int = hot_months
+        self.hot_ttl: float = hot_ttl
+        self.closed_ttl: float | None = closed_ttl
+
+    def ttl(self, deal_ym: str) -> float | None:
+        """계약년월의 캐시 유효시간(초). None이면 만료 없음"""
+        today = date.today()
+        months_ago = (today.year - int(deal_ym[:4])) * 12 + today.month - int(deal_ym[4:6])
+        return self.hot_ttl if months_ago < self.hot_months else self.closed_ttl
+
+    def path(self, endpoint: str, lawd_code: str, deal_ym: str, page: int, n_rows: int) -> Path:
+        return self.cache_dir / endpoint / f"{lawd_code}" / f"{deal_ym}" / f"{page}_{n_rows}.xml"
+
+    def get(self, endpoint: str, lawd_code: str, deal_ym: str, page: int, n_rows: int) -> bytes | None:
+        path = self.path(endpoint, lawd_code, deal_ym, page, n_rows)
+        try:
+            mtime = path.stat().st_mtime
+        except FileNotFoundError:
+            return None
+        ttl = self.ttl(deal_ym)
+        if ttl is not None and mtime + ttl < time.time():
+            return None    # 만료
+        return path.read_bytes()
+
+    def put(self, endpoint: str, lawd_code: str, deal_ym: str, page: int, n_rows: int, content: bytes) -> None:
+        path = self.path(endpoint, lawd_code, deal_ym, page, n_rows)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{threading.get_ident()}.tmp")
+        tmp.write_bytes(content)
+        os.replace(tmp, path)    # 중단되어도 깨진 파일이 남지 않도록 교체
+
+
+class GeocodeCache:
+    """주소 -> 좌표(경도, 위도) 영구 캐시(SQLite)
+
+    찾지 못한 주소도 기록해 두고 `miss_ttl`초가 지나기 전까지는 다시 조회하지 않는다.
+    """
+
+    def __init__(self, path: Path = CACHE_DIR / "geocode.sqlite", miss_ttl: float = 30 * 24 * 60 * 60) -> None:
+        self.path: Path = Path(path)
+        self.miss_ttl: float = miss_ttl
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS geocode (address TEXT PRIMARY KEY, x REAL, y REAL, updated REAL NOT NULL)"
+        )
+
+    def get_many(self, addresses: list[str]) -> dict[str, tuple[float, float] | None]:
+        """캐시에 있는 주소만 반환(찾지 못한 주소는 None)"""
+        result = {}
+        expired = time.time() - self.miss_ttl
+        addresses = list(addresses)
+        for i in range(0, len(addresses), 500):    # SQLite 변수 개수 제한
+            chunk = addresses[i : i + 500]
+            rows = self._conn.execute(
+                f"SELECT address, x, y, updated FROM geocode WHERE address IN ({','.join('?' * len(chunk))})", chunk
+            )
+            for address, x, y, updated in rows:
+                if x is not None:
+                    result[address] = (x, y)
+                elif updated >= expired:
+                    result[address] = None
+        return result
 
+    def put(self, address: str, xy: tuple[float, float] | None) -> None:
+        x, y = xy or (None, None)
+        with self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO geocode VALUES (?, ?, ?, ?)", (address, x, y, time.time()))
+
+
+class BoundaryStore:
+    """(행정구역코드, 기준연도) 단위 경계 저장소(SQLite)
+
+    경계는 행정구역마다 내용 해시와 함께 저장하고, 다시 받으면 해시가 바뀐 행정구역만 갱신한다.
+    지난 연도의 경계는 바뀌지 않는 것으로 보고 다시 받지 않으며, 올해 이후는 `ttl`초마다 다시 받는다.
+    """
+
+    def __init__(self, path: Path = CACHE_DIR / "boundary.sqlite", ttl: float = 30 * 24 * 60 * 60) -> None:
+        self.path: Path = Path(path)
+        self.ttl: float = ttl
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS boundary (adm_cd TEXT, year TEXT, adm_nm TEXT, hash TEXT NOT NULL, feature TEXT NOT NULL, "
+                "updated REAL NOT NULL, PRIMARY KEY (adm_cd, year))"
+            )
+            self._conn.execute(    # 요청(상위 코드, 하위 단계, 연도) -> 받은 행정구역코드 목록
+                "CREATE TABLE IF NOT EXISTS area (parent TEXT, low_search TEXT, year TEXT, codes TEXT NOT NULL, "
+                "fetched REAL NOT NULL, PRIMARY KEY (parent, low_search, year))"
+            )
+
+    def is_fresh(self, parent: str, low_search: str, year: str) -> bool:
+        """다시 받지 않아도 되는지"""
+        row = self._conn.execute(
+            "SELECT fetched FROM area WHERE parent = ? AND low_search = ? AND year = ?", (parent or "", low_search, year)
+        ).fetchone()
+        if row is None:
+            return False
+        return int(year) < date.today().year or row[0] + self.ttl >= time.time()
+
+    def update(self, parent: str, low_search: str, year: str, geojson: str) -> dict[str, list]:
+        """받은 GeoJSON으로 갱신
 
-WORK_DIR = Path(__file__).parent.parent
-IN_DIR, OUT_DIR = WORK_DIR / "input", WORK_DIR / "output"
+        Returns:
+            dict[str, list]: 바뀐 내용
+                added(새 코드), removed(없어진 코드), renamed([코드, 이전 이름, 새 이름]): 이름으로 하는 가격 조인에 영향
+                changed(경계만 바뀐 코드)
+        """
+        features = json.loads(geojson)["features"]
+        rows = {}
+        for feature in features:
+            text = json.dumps(feature, ensure_ascii=False, separators=(",", ":"))
+            properties = feature["properties"]
+            rows[properties["adm_cd"]] = (properties.get("adm_nm"), hashlib.sha1(text.encode()).hexdigest(), text)
+
+        parent = parent or ""
+        previous = self.codes(parent, low_search, year)
+        stored = {
+            adm_cd: (adm_nm, digest)
+            for adm_cd, adm_nm, digest in self._conn.execute(
+                "SELECT adm_cd, adm_nm, hash FROM boundary WHERE year = ? AND adm_cd IN (SELECT value FROM json_each(?))", (year, json.dumps(list(rows)))
+            )
+        }
+
+        # 코드 추가·삭제는 지난 요청의 코드 목록과 비교(처음 받을 때는 알리지 않음)
+        previous_codes = set(previous)
+        added = [code for code in rows if previous and code not in previous_codes]
+        changes = {"added": added, "removed": [code for code in previous if code not in rows], "renamed": [], "changed": []}
+        now = time.time()
+        with self._conn:
+            for adm_cd, (adm_nm, digest, text) in rows.items():
+                if adm_cd in stored and stored[adm_cd][1] == digest:
+                    continue    # 그대로인 행정구역은 다시 쓰지 않음
+                if adm_cd in stored and adm_cd not in added:
+                    if stored[adm_cd][0] != adm_nm:
+                        changes["renamed"].append([adm_cd, stored[adm_cd][0], adm_nm])
+                    else:
+                        changes["changed"].append(adm_cd)
+                self._conn.execute("INSERT OR REPLACE INTO boundary VALUES (?, ?, ?, ?, ?, ?)", (adm_cd, year, adm_nm, digest, text, now))
+            self._conn.execute("INSERT OR REPLACE INTO area VALUES (?, ?, ?, ?, ?)", (parent, low_search, year, json.dumps(list(rows)), now))
+        return changes
+
+    def codes(self, parent: str, low_search: str, year: str) -> list[str]:
+        """마지막으로 받은 행정구역코드(받은 순서)"""
+        row = self._conn.execute(
+            "SELECT codes FROM area WHERE parent = ? AND low_search = ? AND year = ?", (parent or "", low_search, year)
+        ).fetchone()
+        return json.loads(row[0]) if row else []
+
+    def geojson(self, parent: str, low_search: str, year: str) -> str:
+        """저장된 경계로 만든 GeoJSON(받은 순서)"""
+        codes = self.codes(parent, low_search, year)
+        features = dict(self._conn.execute(
+            "SELECT adm_cd, feature FROM boundary WHERE year = ? AND adm_cd IN (SELECT value FROM json_each(?))", (year, json.dumps(codes))
+        ))
+        return '{"type":"FeatureCollection","features":[' + ",".join(features[code] for code in codes) + "]}"
+
+
+##################################################################################
+# 실거래가 응답 파싱
+APT_TRADE_SCHEMA = pa.schema([    # 응답 item 중 사용하는 필드(nullable=False는 필수)
+    pa.field("sggCd", pa.string(), nullable=False),
+    pa.field("umdNm", pa.string()),
+    pa.field("aptNm", pa.string()),
+    pa.field("dealYear", pa.int16(), nullable=False),
+    pa.field("dealMonth", pa.int8(), nullable=False),
+    pa.field("dealDay", pa.int8()),
+    pa.field("dealingGbn", pa.string()),
+    pa.field("excluUseAr", pa.float64(), nullable=False),
+    pa.field("dealAmount", pa.int64(), nullable=False),    # "82,000" -> 82000(만원)
+    pa.field("cdealDay", pa.string()),    # 해제사유발생일. 취소되지 않은 거래는 null
+])
+RESULT_CODE = re.compile(rb"<resultCode>\s*(\w+)\s*</resultCode>")
+_META_TAGS = {"resultCode", "resultMsg", "numOfRows", "pageNo", "totalCount"}
+
+
+def _coerce(name: str, values: list[str | None], field: pa.Field) -> pa.Array:
+    """문자열 열 -> 선언된 형식(숫자의 천 단위 콤마 제거)"""
+    array = pa.array(values, pa.string())
+    if pa.types.is_string(field.type):
+        return array
+    if pa.types.is_integer(field.type):
+        array = pc.replace_substring(array, ",", "")
+    try:
+        return array.cast(field.type)
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as e:
+        raise ValueError(f"invalid {name}, {e}") from None
+
+
+def parse_items(content: bytes, schema: pa.Schema = APT_TRADE_SCHEMA) -> tuple[dict[str, str], pa.Table]:
+    """XML 응답을 행 단위 dict 없이 열 단위로 읽어 `schema`의 Table로 변환
+
+    `item`이 하나뿐이거나 없어도 같은 형식의 Table을 반환하고, 스키마에 없는 필드는 읽지 않는다.
+    빈 값은 null이며 필수 필드(nullable=False)가 비어 있으면 ValueError.
+
+    Args:
+        content (bytes): API 응답
+        schema (pa.Schema, optional): item 필드와 형식. Defaults to APT_TRADE_SCHEMA.
+
+    Returns:
+        tuple[dict[str, str], pa.Table]: (header·body 값(resultCode, totalCount 등), item 표)
+    """
+    columns: dict[str, list] = {name: [] for name in schema.names}
+    meta: dict[str, str] = {}
+    for _, elem in ET.iterparse(io.BytesIO(content), events=("end",)):
+        if elem.tag == "item":
+            texts = {child.tag: child.text for child in elem}    # 자식을 한 번만 순회
+            for name, column in columns.items():
+                value = texts.get(name)
+                column.append(value.strip() or None if value else None)
+            elem.clear()    # 읽은 item은 바로 해제
+        elif elem.tag in _META_TAGS:
+            meta[elem.tag] = (elem.text or "").strip()
+
+    arrays = []
+    for field in schema:
+        array = _coerce(field.name, columns[field.name], field)
+        if not field.nullable and array.null_count:
+            raise ValueError(f"missing {field.name}, got {array.null_count} empty of {len(array)}")
+        arrays.append(array)
+    return meta, pa.Table.from_arrays(arrays, schema=schema)
 
 
 ##################################################################################
 # Datagokr
 logger = logging.getLogger(__name__)
+DATAGO_LIMITER = RateLimiter(calls=25, period=1, name="datago")    # 모든 Datagokr 객체가 공유하는 호출 한도
+
 class RespType(str, Enum):
     JSON = "json"
     XML = "xml"
@@ -37,17 +389,32 @@ class RespType(str, Enum):
 
 
 class Datagokr:
-    def __init__(self, api_key: str = None) -> None:
+    def __init__(
+        self,
+        api_key: str = None,
+        limiter: RateLimiter = None,
+        session: requests.Session = None,
+        pool_size: int = 10,
+        request_timeout: float = 30,
+        retries: int = 3,
+        cache: ResponseCache = None,
+    ) -> None:
         if not api_key:
             raise ValueError(f"invalid api_key, got {api_key!r}")
         self.api_key = api_key
+        self.limiter = limiter or DATAGO_LIMITER
+        self.session = session or make_session(pool_size=pool_size, retries=retries)
+        self.request_timeout = request_timeout
+        self.cache = cache
 
-    @sleep_and_retry
-    @limits(calls=25, period=1)
     def lawd_code(self, region: str = None, n_rows: int = 1000) -> list[dict]:
         # https://www.data.go.kr/data/15077871/openapi.do
+        return list(self.iter_lawd_code(region, n_rows))
+
+    def iter_lawd_code(self, region: str = None, n_rows: int = 1000) -> Iterator[dict]:
+        """`lawd_code`의 행을 페이지를 받는 대로 반환(다음 페이지는 소비할 때 요청)"""
         def _api_call(region: str, n_rows: int, page: int) -> dict:
-            url = "http://apis.data.go.kr/1741000/StanReginCd/getStanReginCdList"
+            url = f"{DATAGO_URL}/1741000/StanReginCd/getStanReginCdList"
             params = {
                 "serviceKey": f"{self.api_key}",
                 "pageNo": f"{page}",
@@ -55,16 +422,19 @@ class Datagokr:
                 "type": f"{RespType.JSON}",
                 "locatadd_nm": region,
             }
-            resp = requests.get(url, params=params)
+            self.limiter.acquire()
+            with METRICS.span("api_call", api="datago", endpoint="getStanReginCdList"):
+                resp = self.session.get(url, params=params, timeout=self.request_timeout)
+            METRICS.inc("api_calls_total", api="datago", endpoint="getStanReginCdList", status=resp.status_code)
             try:
                 return resp.json()
             except json.JSONDecodeError:
+                import xmltodict
                 return xmltodict.parse(resp.content)
 
         page: int = 1
         total_cnt: int = None
         total_page: int = None
-        result: list[dict] = []
         while True:
             parsed = _api_call(region=region, n_rows=n_rows, page=page)
             if "StanReginCd" in parsed:
@@ -73,16 +443,16 @@ class Datagokr:
                     head = first.get("head", [])
                     total_cnt = head[0].get("totalCount", 0)
                 row = second.get("row", [])
+                yield from row
                 if n_rows >= total_cnt:
-                    return row
-                result += row
+                    return
 
                 if not total_page:
                     total_page, remainder = divmod(total_cnt, n_rows)
                     if remainder > 0:
                         total_page += 1
                 if page >= total_page:
-                    return result
+                    return
                 page += 1
 
             elif "RESULT" in parsed:
@@ -94,28 +464,42 @@ class Datagokr:
             else:
                 raise ValueError(f"invalid response, got {parsed!r}")
 
-    @sleep_and_retry
-    @limits(calls=25, period=1)
-    def apt_trade(self, lawd_code: str, deal_ym: str, n_rows: int = 9999) -> list[dict]:
-        # https://www.data.go.kr/data/15126469/openapi.do
-        def _api_call(lawd_code: str, deal_ym: str, n_rows: int, page: int) -> dict:
-            url = "http://apis.data.go.kr/1613000/RTMSDataSvcAptTrade/getRTMSDataSvcAptTrade"
-            params = {
-                "serviceKey": f"{self.api_key}",
-                "LAWD_CD": f"{lawd_code}",
-                "DEAL_YMD": f"{deal_ym}",
-                "numOfRows": f"{n_rows}",
-                "pageNo": f"{page}",
-            }
-            resp = requests.get(url, params=params)
-            resp.raise_for_status()
-            return xmltodict.parse(resp.content)
-
+    def _rtms_page(self, endpoint: str, url: str, lawd_code: str, deal_ym: str, n_rows: int, page: int) -> bytes:
+        """실거래가 API 응답 한 페이지(캐시에 있으면 호출하지 않음)"""
+        if self.cache:
+            content = self.cache.get(endpoint, lawd_code, deal_ym, page, n_rows)
+            METRICS.inc("cache_requests_total", endpoint=endpoint, result="miss" if content is None else "hit")
+            if content is not None:
+                return content
+
+        params = {
+            "serviceKey": f"{self.api_key}",
+            "LAWD_CD": f"{lawd_code}",
+            "DEAL_YMD": f"{deal_ym}",
+            "numOfRows": f"{n_rows}",
+            "pageNo": f"{page}",
+        }
+        self.limiter.acquire()
+        with METRICS.span("api_call", api="datago", endpoint=endpoint):
+            resp = self.session.get(url, params=params, timeout=self.request_timeout)
+        METRICS.inc("api_calls_total", api="datago", endpoint=endpoint, status=resp.status_code)
+        METRICS.inc("api_response_bytes_total", len(resp.content), api="datago", endpoint=endpoint)
+        resp.raise_for_status()
+        match = RESULT_CODE.search(resp.content)
+        if self.cache and match and match.group(1) == b"000":
+            self.cache.put(endpoint, lawd_code, deal_ym, page, n_rows, resp.content)   # 정상 응답만 저장
+        return resp.content
+
+    def _iter_rtms_items(self, endpoint: str, url: str, lawd_code: str, deal_ym: str, n_rows: int) -> Iterator[dict]:
         page: int = 1
         total_cnt: int = None
-        result: list[dict] = []
+        n_items: int = 0
         while True:
-            parsed = _api_call(lawd_code=lawd_code, deal_ym=deal_ym, n_rows=n_rows, page=page)
+            content = self._rtms_page(endpoint, url, lawd_code, deal_ym, n_rows, page)
+            import xmltodict    # dict 경로에서만 필요(표 경로는 parse_items)
+            with METRICS.span("parse", endpoint=endpoint, parser="xmltodict"):
+                parsed = xmltodict.parse(content)
+            METRICS.inc("pages_total", endpoint=endpoint)
             response: dict = parsed.get("response", {})
             header: dict = response.get("header", {})
             result_code = header.get("resultCode", "")
@@ -123,57 +507,83 @@ class Datagokr:
                 body: dict = response.get("body", {})
                 items: dict = body.get("items", {})
                 if items:
-                    item: list = items.get("item", [])
-                    result += item
+                    item: list | dict = items.get("item", [])
+                    item = [item] if isinstance(item, dict) else item    # item이 하나면 dict
+                    METRICS.inc("items_total", len(item), endpoint=endpoint)
+                    yield from item
+                    n_items += len(item)
                     total_cnt = int(body.get("totalCount", 0))
-                    if len(result) >= total_cnt:
-                        return result
+                    if n_items >= total_cnt:
+                        return
                     page += 1
                 else:
-                    return result
+                    return
             else:
                 raise ValueError(f'[{result_code}] {header.get("resultMsg","")}')
 
-    @sleep_and_retry
-    @limits(calls=25, period=1)
+    def _iter_rtms_tables(self, endpoint: str, url: str, lawd_code: str, deal_ym: str, n_rows: int, schema: pa.Schema) -> Iterator[pa.Table]:
+        page: int = 1
+        n_items: int = 0
+        while True:
+            content = self._rtms_page(endpoint, url, lawd_code, deal_ym, n_rows, page)
+            with METRICS.span("parse", endpoint=endpoint, parser="arrow"):
+                meta, table = parse_items(content, schema)
+            METRICS.inc("pages_total", endpoint=endpoint)
+            METRICS.inc("items_total", table.num_rows, endpoint=endpoint)
+            result_code = meta.get("resultCode", "")
+            if result_code != "000":
+                raise ValueError(f'[{result_code}] {meta.get("resultMsg", "")}')
+            yield table
+            n_items += table.num_rows
+            if not table.num_rows or n_items >= int(meta.get("totalCount") or 0):
+                return
+            page += 1
+
+    def apt_trade(self, lawd_code: str, deal_ym: str, n_rows: int = 9999) -> list[dict]:
+        # https://www.data.go.kr/data/15126469/openapi.do
+        return list(self.iter_apt_trade(lawd_code, deal_ym, n_rows))
+
+    def iter_apt_trade(self, lawd_code: str, deal_ym: str, n_rows: int = 9999) -> Iterator[dict]:
+        """`apt_trade`의 행을 페이지를 받는 대로 반환(다음 페이지는 소비할 때 요청)"""
+        endpoint = "getRTMSDataSvcAptTrade"
+        url = f"{DATAGO_URL}/1613000/RTMSDataSvcAptTrade/{endpoint}"
+        return self._iter_rtms_items(endpoint, url, lawd_code, deal_ym, n_rows)
+
+    def apt_trade_table(self, lawd_code: str, deal_ym: str, n_rows: int = 9999, schema: pa.Schema = APT_TRADE_SCHEMA) -> pa.Table:
+        """`apt_trade`와 같은 조회를 `schema` 형식의 Arrow Table로(대량 수집용)"""
+        return pa.concat_tables(list(self.iter_apt_trade_pages(lawd_code, deal_ym, n_rows, schema)))
+
+    def iter_apt_trade_pages(self, lawd_code: str, deal_ym: str, n_rows: int = 9999, schema: pa.Schema = APT_TRADE_SCHEMA) -> Iterator[pa.Table]:
+        """`apt_trade_table`을 페이지별 Table로 받는 대로 반환(최소 한 개)"""
+        endpoint = "getRTMSDataSvcAptTrade"
+        url = f"{DATAGO_URL}/1613000/RTMSDataSvcAptTrade/{endpoint}"
+        return self._iter_rtms_tables(endpoint, url, lawd_code, deal_ym, n_rows, schema)
+
+    async def aiter_apt_trade_pages(self, lawd_code: str, deal_ym: str, n_rows: int = 9999, schema: pa.Schema = APT_TRADE_SCHEMA) -> AsyncIterator[pa.Table]:
+        """`iter_apt_trade_pages`의 비동기 버전(요청·파싱은 스레드에서 실행해 이벤트 루프를 막지 않음)
+
+        Example:
+            >>> async for table in datagokr.aiter_apt_trade_pages("11680", "202401"):
+            ...     writer.write_table(table)
+        """
+        pages = self.iter_apt_trade_pages(lawd_code, deal_ym, n_rows, schema)
+        done = object()
+        while True:
+            table = await asyncio.to_thread(next, pages, done)    # 소비할 때만 다음 페이지 요청
+            if table is done:
+                return
+            yield table
+
     def apt_trade_detailed(self, lawd_code: str, deal_ym: str, n_rows: int = 1000) -> list[dict]:
         # https://www.data.go.kr/data/15126468/openapi.do
-        def _api_call(lawd_code: str, deal_ym: str, n_rows: int, page: int) -> dict:
-            url = "http://apis.data.go.kr/1613000/RTMSDataSvcAptTradeDev/getRTMSDataSvcAptTradeDev"
-            params = {
-                "serviceKey": f"{self.api_key}",
-                "LAWD_CD": f"{lawd_code}",
-                "DEAL_YMD": f"{deal_ym}",
-                "numOfRows": f"{n_rows}",
-                "pageNo": f"{page}",
-            }
-            resp = requests.get(url, params=params)
-            resp.raise_for_status()
-            return xmltodict.parse(resp.content)
+        return list(self.iter_apt_trade_detailed(lawd_code, deal_ym, n_rows))
+
+    def iter_apt_trade_detailed(self, lawd_code: str, deal_ym: str, n_rows: int = 1000) -> Iterator[dict]:
+        """`apt_trade_detailed`의 행을 페이지를 받는 대로 반환(다음 페이지는 소비할 때 요청)"""
+        endpoint = "getRTMSDataSvcAptTradeDev"
+        url = f"{DATAGO_URL}/1613000/RTMSDataSvcAptTradeDev/{endpoint}"
+        return self._iter_rtms_items(endpoint, url, lawd_code, deal_ym, n_rows)
 
-        page: int = 1
-        total_cnt: int = None
-        result: list[dict] = []
-        while True:
-            parsed = _api_call(lawd_code=lawd_code, deal_ym=deal_ym, n_rows=n_rows, page=page)
-            response: dict = parsed.get("response", {})
-            header: dict = response.get("header", {})
-            result_code = header.get("resultCode", "")
-            if result_code == "000":
-                body: dict = response.get("body", {})
-                items: dict = body.get("items", {})
-                if items:
-                    item: list = items.get("item", [])
-                    result += item
-                    total_cnt = int(body.get("totalCount", 0))
-                    if len(result) >= total_cnt:
-                        return result
-                    page += 1
-                else:
-                    return result
-            else:
-                raise ValueError(f'[{result_code}] {header.get("resultMsg","")}')
-            
 
 ##################################################################################
 # Sgis            
@@ -186,12 +596,30 @@ class AuthenticationError(Exception):
         super().__init__(*args)
 
 
+SGIS_NO_RESULT = "-100"    # 검색결과가 존재하지 않습니다
+SGIS_LIMITER = RateLimiter(calls=10, period=1, name="sgis")    # 모든 Sgis 객체가 공유하는 호출 한도
+
 class Sgis:
     """통계지리정보서비스 SGIS"""
 
-    def __init__(self, api_key: str, api_sec: str) -> None:
+    def __init__(
+        self,
+        api_key: str,
+        api_sec: str,
+        session: requests.Session = None,
+        pool_size: int = 10,
+        request_timeout: float = 30,
+        retries: int = 5,
+        backoff: float = 1.0,
+        limiter: RateLimiter = None,
+    ) -> None:
         self.api_key: str = api_key
         self.api_sec: str = api_sec
+        self.limiter: RateLimiter = limiter or SGIS_LIMITER
+        self.session: requests.Session = session or make_session(pool_size=pool_size, retries=retries, backoff=backoff)
+        self.request_timeout: float = request_timeout
+        self.retries: int = retries
+        self.backoff: float = backoff
 
     @property
     def timeout(self) -> float:
@@ -214,9 +642,11 @@ class Sgis:
 
     def auth(self) -> dict:
         # https://sgis.kostat.go.kr/developer/html/newOpenApi/api/dataApi/basics.html#auth
-        url = "https://sgisapi.kostat.go.kr/OpenAPI3/auth/authentication.json"
+        url = f"{SGIS_URL}/OpenAPI3/auth/authentication.json"
         params = dict(consumer_key=self.api_key, consumer_secret=self.api_sec)
-        resp = requests.get(url, params=params)
+        with METRICS.span("api_call", api="sgis", endpoint="authentication"):
+            resp = self.session.get(url, params=params, timeout=self.request_timeout)
+        METRICS.inc("api_calls_total", api="sgis", endpoint="authentication", status=resp.status_code)
         parsed = resp.json()
         self.raise_for_err_cd(parsed)
 
@@ -236,7 +666,7 @@ class Sgis:
         self,
         adm_cd: str = None,
         low_search: Literal["0", "1", "2"] = "1",
-        year: str = "2023",
+        year: str = BOUNDARY_YEAR,
         session: requests.Session = None,
     ) -> str:
         """행정구역 코드 이용 행정구역 경계 정보 제공 API(좌표계: WGS84 "EPSG:4326")
@@ -244,7 +674,7 @@ class Sgis:
         Args:
             adm_cd (str, optional): 행정구역코드. Defaults to None.
             low_search (str, optional): 하위 통계 정보 유무. Defaults to "1".
-            year (str, optional): 기준연도("2000" ~ "2023"). Defaults to "2023".
+            year (str, optional): 기준연도("2000" ~ "2023"). Defaults to BOUNDARY_YEAR.
             session (requests.Session, optional): 세션. Defaults to None.
 
         Returns:
@@ -257,14 +687,18 @@ class Sgis:
         except ImportError:
             raise ImportError("The geopandas package is required for fetching data. You can install it using `pip install -U geopandas`")
 
-        url = "https://sgisapi.kostat.go.kr/OpenAPI3/boundary/hadmarea.geojson"
+        url = f"{SGIS_URL}/OpenAPI3/boundary/hadmarea.geojson"
         params = dict(
             accessToken=self.access_token,
             adm_cd=adm_cd,
             low_search=low_search,
             year=year,
         )
-        resp = session.get(url, params=params) if session else requests.get(url, params=params)
+        session = session or self.session
+        self.limiter.acquire()
+        with METRICS.span("api_call", api="sgis", endpoint="hadmarea"):
+            resp = session.get(url, params=params, timeout=self.request_timeout)
+        METRICS.inc("api_calls_total", api="sgis", endpoint="hadmarea", status=resp.status_code)
         parsed = resp.json()
         self.raise_for_err_cd(parsed)
 
@@ -286,27 +720,36 @@ class Sgis:
             list[dict]: 검색결과
         """
         # https://sgis.kostat.go.kr/developer/html/newOpenApi/api/dataApi/addressBoundary.html#geocodewgs84
-        url = "https://sgisapi.kostat.go.kr/OpenAPI3/addr/geocodewgs84.json"
+        url = f"{SGIS_URL}/OpenAPI3/addr/geocodewgs84.json"
         params = dict(
             accessToken=self.access_token,
             address=f"{address}",
             pagenum=f"{page}",
             resultcount=f"{limit}",
         )
-        for cnt in range(200):
+        session = session or self.session
+        for cnt in range(self.retries + 1):
+            if cnt:
+                METRICS.inc("api_retries_total", api="sgis", endpoint="geocodewgs84")
+                with METRICS.span("retry_backoff", api="sgis"):
+                    time.sleep(self.backoff * 2 ** (cnt - 1))   # 지수 백오프
             try:
-                resp = session.get(url, params=params) if session else requests.get(url, params=params)
+                self.limiter.acquire()
+                with METRICS.span("api_call", api="sgis", endpoint="geocodewgs84"):
+                    resp = session.get(url, params=params, timeout=self.request_timeout)
+                METRICS.inc("api_calls_total", api="sgis", endpoint="geocodewgs84", status=resp.status_code)
                 parsed: dict = resp.json()
+                if f"{parsed.get('errCd', 0)}" == SGIS_NO_RESULT:
+                    return []    # 재시도하지 않음
                 self.raise_for_err_cd(parsed)
                 result: dict = parsed.get("result", {})
                 return result.get("resultdata", [])
             except AuthenticationError as err:
                 logger.warning(f"{err}")
-                time.sleep(10)
                 self.auth()
+                params["accessToken"] = self._token
             except ValueError as err:
                 logger.warning(f"{err}")
-                time.sleep(10)
         raise ValueError(f"invalid cnt, {cnt=}")
 
     def geocode_utmk(self, address: str, page: int = 0, limit: int = 5, session: requests.Session = None) -> list[dict]:
@@ -322,15 +765,21 @@ class Sgis:
             list[dict]: 검색결과
         """
         # https://sgis.kostat.go.kr/developer/html/newOpenApi/api/dataApi/addressBoundary.html#geocode
-        url = "https://sgisapi.kostat.go.kr/OpenAPI3/addr/geocode.json"
+        url = f"{SGIS_URL}/OpenAPI3/addr/geocode.json"
         params = dict(
             accessToken=self.access_token,
             address=f"{address}",
             pagenum=f"{page}",
             resultcount=f"{limit}",
         )
-        resp = session.get(url, params=params) if session else requests.get(url, params=params)
+        session = session or self.session
+        self.limiter.acquire()
+        with METRICS.span("api_call", api="sgis", endpoint="geocode"):
+            resp = session.get(url, params=params, timeout=self.request_timeout)
+        METRICS.inc("api_calls_total", api="sgis", endpoint="geocode", status=resp.status_code)
         parsed: dict = resp.json()
+        if f"{parsed.get('errCd', 0)}" == SGIS_NO_RESULT:
+            return []
         self.raise_for_err_cd(parsed)
 
         result: dict = parsed.get("result", {})
@@ -0,0 +1,220 @@
+import hashlib
+import os
+from pathlib import Path
+
+from .config import CACHE_DIR
+
+#####################################################################################
+# 다중 해상도 경계
+SIMPLIFY_LEVELS = {0: 200.0, 11: 50.0, 13: 10.0, 15: 0.0}    # 최소 줌 -> 단순화 허용오차(m), 대략 화면 1픽셀
+COORD_PRECISION = 5    # 소수점 5자리(약 1m)로 좌표 양자화
+SIMPLIFY_CACHE = CACHE_DIR / "simplify"    # 경계 내용 해시별 단순화 결과
+
+
+def level_for_zoom(zoom: float) -> int:
+    """지도 줌에 맞는 해상도(SIMPLIFY_LEVELS의 키)"""
+    return max(level for level in SIMPLIFY_LEVELS if level <= max(zoom, 0))
+
+
+def level_path(path: Path, level: int) -> Path:
+    """해상도별 파일 경로("merge.geojson" -> "merge_z11.geojson")"""
+    path = Path(path)
+    return path.with_name(f"{path.stem}_z{level}{path.suffix}")
+
+
+def geometry_digest(geometry, *extra) -> str:
+    """도형 배열(순서 포함)과 `extra` 값의 내용 해시"""
+    import shapely
+
+    digest = hashlib.sha1(repr(extra).encode())
+    for wkb in shapely.to_wkb(geometry):
+        digest.update(len(wkb).to_bytes(8, "little"))
+        digest.update(wkb)
+    return digest.hexdigest()
+
+
+def simplify_coverage(gdf: "gpd.GeoDataFrame", tolerance: float, precision: int = COORD_PRECISION, use_cache: bool = True) -> "gpd.GeoDataFrame":
+    """인접한 행정구역이 경계를 공유한 채로 단순화(틈·겹침 없음)하고 좌표를 양자화
+
+    단순화 결과는 경계 내용 해시별로 SIMPLIFY_CACHE에 저장해 경계가 그대로면(가격만 바뀐 갱신 등) 재사용한다.
+
+    Args:
+        gdf (gpd.GeoDataFrame): 행정구역 경계
+        tolerance (float): 허용오차(m). 0이면 단순화하지 않음
+        precision (int, optional): 좌표 소수점 자리수. Defaults to COORD_PRECISION.
+        use_cache (bool, optional): 저장된 단순화 결과 사용 여부. Defaults to True.
+
+    Returns:
+        gpd.GeoDataFrame: 입력과 같은 좌표계의 경계
+    """
+    import geopandas as gpd    # 앱에서 해상도 선택만 할 때는 불러오지 않음
+    import numpy as np
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import shapely
+
+    geometry = gdf.geometry.values
+    if tolerance:
+        cache_path = SIMPLIFY_CACHE / f"{geometry_digest(geometry, f'{gdf.crs}', tolerance)}.arrow"
+        if use_cache and cache_path.exists():
+            geometry = shapely.from_wkb(feather.read_table(cache_path, memory_map=True)["wkb"].to_numpy(zero_copy_only=False))
+        else:
+            projected = gdf.geometry.to_crs("EPSG:5179")    # 미터 단위로 단순화
+            simplified = shapely.coverage_simplify(projected.values, tolerance)
+            geometry = gpd.GeoSeries(simplified, crs="EPSG:5179").to_crs(gdf.crs).values
+            SIMPLIFY_CACHE.mkdir(parents=True, exist_ok=True)
+            tmp = cache_path.with_suffix(f".{os.getpid()}.tmp")
+            feather.write_feather(pa.table({"wkb": pa.array(shapely.to_wkb(geometry), pa.binary())}), tmp)
+            os.replace(tmp, cache_path)
+    quantized = shapely.transform(geometry, lambda xy: np.round(xy, precision))    # 공유 꼭짓점은 같은 값으로 반올림
+    return gdf.set_geometry(gpd.GeoSeries(quantized, index=gdf.index, crs=gdf.crs))
+
+
+def write_levels(gdf: "gpd.GeoDataFrame", path: Path) -> list[Path]:
+    """SIMPLIFY_LEVELS의 해상도별 GeoJSON을 `path` 옆에 저장
+
+    Returns:
+        list[Path]: 저장한 파일
+    """
+    written = []
+    for level, tolerance in SIMPLIFY_LEVELS.items():
+        out = level_path(path, level)
+        str_jsoned = simplify_coverage(gdf, tolerance).to_json(drop_id=True, ensure_ascii=False, separators=(",", ":"))
+        out.write_text(str_jsoned, encoding="utf-8")
+        written.append(out)
+    return written
+
+
+#####################################################################################
+# 이진 스냅샷
+def snapshot_path(path: Path) -> Path:
+    """GeoJSON 옆의 GeoParquet 스냅샷 경로("merge.geojson" -> "merge.parquet")"""
+    return Path(path).with_suffix(".parquet")
+
+
+def _fresh_snapshot(path: Path) -> Path | None:
+    """GeoJSON보다 오래되지 않은 스냅샷(없거나 낡았으면 None)"""
+    snapshot = snapshot_path(path)
+    try:
+        if snapshot.stat().st_mtime_ns >= Path(path).stat().st_mtime_ns:
+            return snapshot
+    except FileNotFoundError:
+        pass
+    return None
+
+
+def write_snapshot(gdf: "gpd.GeoDataFrame", path: Path) -> Path:
+    """GeoJSON과 같은 내용을 GeoParquet(WKB 도형, zstd)로 `path` 옆에 저장
+
+    GeoJSON을 쓴 다음에 호출해야 읽는 쪽에서 최신으로 인식한다.
+
+    Returns:
+        Path: 저장한 파일
+    """
+    out = snapshot_path(path)
+    tmp = out.with_suffix(".tmp")
+    gdf.to_parquet(tmp, index=False, compression="zstd")
+    tmp.replace(out)
+    return out
+
+
+def read_frame(path: Path, columns: list[str] = None) -> "pd.DataFrame":
+    """도형을 뺀 속성 표(geopandas 없이 스냅샷을 메모리 매핑해 읽고, 없으면 GeoJSON)
+
+    Args:
+        path (Path): GeoJSON 경로
+        columns (list[str], optional): 읽을 열. Defaults to None(도형을 뺀 전체).
+    """
+    import json
+
+    import pandas as pd
+
+    snapshot = _fresh_snapshot(path)
+    if snapshot is None:
+        features = json.loads(Path(path).read_bytes())["features"]
+        df = pd.DataFrame([feature["properties"] for feature in features])
+        return df if columns is None else df[columns]
+
+    import pyarrow.parquet as pq
+
+    if columns is None:
+        schema = pq.read_schema(snapshot, memory_map=True)
+        columns = [name for name in schema.names if name not in _geo_columns(schema)]
+    return pq.read_table(snapshot, columns=columns, memory_map=True).to_pandas()
+
+
+def _geo_columns(schema: "pa.Schema") -> dict[str, dict]:
+    """GeoParquet 메타데이터의 도형 열 -> {encoding, crs, ...}"""
+    import json
+
+    return json.loads(schema.metadata[b"geo"])["columns"] if b"geo" in (schema.metadata or {}) else {}
+
+
+def read_geoframe(path: Path) -> "gpd.GeoDataFrame":
+    """경계와 속성(스냅샷이 있으면 GeoParquet, 없으면 GeoJSON)
+
+    `gpd.read_parquet`은 좌표계를 PROJJSON에서 해석하느라 읽기보다 오래 걸리므로(약 30ms)
+    WKB를 직접 풀고 좌표계는 EPSG 코드로 만든다.
+    """
+    import geopandas as gpd
+
+    snapshot = _fresh_snapshot(path)
+    if snapshot is None:
+        return gpd.read_file(path, encoding="utf-8")
+
+    import pyarrow.parquet as pq
+    import shapely
+
+    table = pq.read_table(snapshot, memory_map=True)
+    geo_columns = _geo_columns(table.schema)
+    name, meta = next(iter(geo_columns.items()))
+    crs = meta.get("crs", "OGC:CRS84")    # GeoParquet 규격: 없으면 경위도
+    if isinstance(crs, dict) and "id" in crs:
+        crs = f"{crs['id']['authority']}:{crs['id']['code']}"
+    df = table.drop_columns(list(geo_columns)).to_pandas()
+    return gpd.GeoDataFrame(df, geometry=gpd.GeoSeries(shapely.from_wkb(table[name].to_numpy()), crs=crs, name=name))
+
+
+#####################################################################################
+# 공간 색인
+class BoundaryIndex:
+    """행정구역 경계의 STRtree 색인(점·도형이 속한 행정구역 조회)"""
+
+    _built: dict[str, "BoundaryIndex"] = {}    # 경계 내용 해시 -> 색인(프로세스 안에서 재사용)
+
+    def __init__(self, gdf: "gpd.GeoDataFrame", key: str = "adm_cd") -> None:
+        import shapely
+
+        self.keys = gdf[key].to_numpy()
+        self.geometry = gdf.geometry.values
+        self.tree = shapely.STRtree(self.geometry)
+
+    @classmethod
+    def cached(cls, gdf: "gpd.GeoDataFrame", key: str = "adm_cd", max_size: int = 8) -> "BoundaryIndex":
+        """같은 경계·키로 이미 만든 색인이 있으면 재사용"""
+        digest = geometry_digest(gdf.geometry.values, key, gdf[key].tolist())
+        index = cls._built.get(digest)
+        if index is None:
+            if len(cls._built) >= max_size:
+                cls._built.pop(next(iter(cls._built)))    # 가장 먼저 만든 색인
+            index = cls._built[digest] = cls(gdf, key=key)
+        return index
+
+    def locate(self, x: float, y: float) -> str | None:
+        """좌표(경도, 위도)가 속한 행정구역 키"""
+        import shapely
+
+        hits = self.tree.query(shapely.Point(x, y), predicate="intersects")
+        return self.keys[hits.min()] if len(hits) else None
+
+    def locate_many(self, geometry) -> "np.ndarray":
+        """도형(대개 점) 배열 각각이 속한 행정구역 키(없으면 None)"""
+        import numpy as np
+
+        result = np.full(len(geometry), None, dtype=object)
+        src, dst = self.tree.query(geometry, predicate="intersects")
+        order = np.lexsort([dst, src])
+        src, dst = src[order], dst[order]
+        f_first = np.append(True, src[1:] != src[:-1])    # 경계 위의 점은 첫 번째 행정구역으로
+        result[src[f_first]] = self.keys[dst[f_first]]
+        return result
@@ -0,0 +1,202 @@
+from contextlib import contextmanager
+import cProfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import logging
+import os
+from pathlib import Path
+import threading
+import time
+from typing import Iterator
+
+logger = logging.getLogger(__name__)
+
+
+#####################################################################################
+# 구간 시간·카운터
+class Metrics:
+    """구간(span) 시간과 카운터 모음(스레드 안전)
+
+    `span`은 이름·레이블별 횟수/합계/최대 시간을 모으고, `trace`를 켜면 각 구간을
+    Chrome trace 이벤트로도 남긴다. DEBUG 로그를 켜면 구간마다 JSON 한 줄을 기록한다.
+
+    Example:
+        >>> with METRICS.span("api_call", api="datago"):
+        ...     resp = session.get(url)
+        >>> METRICS.inc("pages_total", endpoint="getRTMSDataSvcAptTrade")
+        >>> print(METRICS.prometheus())
+    """
+
+    def __init__(self, trace: bool = False, max_events: int = 100_000) -> None:
+        self.trace: bool = trace
+        self.max_events: int = max_events
+        self.counters: dict[tuple[str, tuple], float] = {}
+        self.timings: dict[tuple[str, tuple], list[float]] = {}    # [count, sum, max]
+        self.events: list[dict] = []
+        self._started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(name: str, labels: dict) -> tuple[str, tuple]:
+        return name, tuple(sorted((key, f"{value}") for key, value in labels.items()))
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        """카운터 증가"""
+        key = self._key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float, **labels) -> None:
+        """측정한 시간 기록(`span`을 쓸 수 없는 곳, 예: 호출 한도 대기)"""
+        key = self._key(name, labels)
+        with self._lock:
+            stat = self.timings.setdefault(key, [0, 0.0, 0.0])
+            stat[0] += 1
+            stat[1] += seconds
+            stat[2] = max(stat[2], seconds)
+
+    @contextmanager
+    def span(self, name: str, **labels) -> Iterator[None]:
+        """구간 시간 측정"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - started
+            self.observe(name, seconds, **labels)
+            if self.trace and len(self.events) < self.max_events:
+                event = {
+                    "name": name,
+                    "ph": "X",
+                    "ts": (started - self._started) * 1e6,
+                    "dur": seconds * 1e6,
+                    "pid": os.getpid(),
+                    "tid": threading.get_ident(),
+                    "args": labels,
+                }
+                with self._lock:
+                    self.events.append(event)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(json.dumps({"span": name, "seconds": round(seconds, 6), **labels}, ensure_ascii=False, default=str))
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counters.clear()
+            self.timings.clear()
+            self.events.clear()
+            self._started = time.perf_counter()
+
+    def summary(self) -> dict:
+        """구간·카운터 값(JSON으로 바꿀 수 있는 형태)"""
+        with self._lock:
+            return {
+                "spans": [
+                    {"name": name, **dict(labels), "count": count, "seconds": total, "max_seconds": peak}
+                    for (name, labels), (count, total, peak) in sorted(self.timings.items())
+                ],
+                "counters": [
+                    {"name": name, **dict(labels), "value": value}
+                    for (name, labels), value in sorted(self.counters.items())
+                ],
+            }
+
+    def prometheus(self) -> str:
+        """Prometheus 텍스트 형식(구간은 `{name}_seconds` summary와 `{name}_seconds_max` gauge, 카운터는 counter)"""
+        def _labels(labels):
+            if not labels:
+                return ""
+            escaped = (value.replace("\\", "\\\\").replace('"', '\\"') for _, value in labels)
+            return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + "}"
+
+        lines = []
+        with self._lock:
+            timings = sorted(self.timings.items())
+            counters = sorted(self.counters.items())
+        typed = set()
+        families: dict[str, list] = {}
+        for (name, labels), stat in timings:
+            families.setdefault(name, []).append((labels, stat))
+        for name, rows in families.items():
+            # summary에는 _count·_sum(·분위수)만 허용되므로 최대값은 별도 gauge로
+            lines.append(f"# TYPE {name}_seconds summary")
+            for labels, (count, total, _) in rows:
+                lines.append(f"{name}_seconds_count{_labels(labels)} {count}")
+                lines.append(f"{name}_seconds_sum{_labels(labels)} {total:.6f}")
+            lines.append(f"# TYPE {name}_seconds_max gauge")
+            for labels, (_, _, peak) in rows:
+                lines.append(f"{name}_seconds_max{_labels(labels)} {peak:.6f}")
+            typed.update((f"{name}_seconds", f"{name}_seconds_max"))
+        for (name, labels), value in counters:
+            if name not in typed:
+                lines.append(f"# TYPE {name} counter")
+                typed.add(name)
+            lines.append(f"{name}{_labels(labels)} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    def write_trace(self, path: Path) -> None:
+        """Chrome trace 형식(chrome://tracing, Perfetto에서 열기)으로 저장"""
+        with self._lock:
+            events = list(self.events)
+        Path(path).write_text(json.dumps({"traceEvents": events}, ensure_ascii=False, default=str), encoding="utf-8")
+
+    def serve(self, port: int = 9108, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+        """`/metrics`로 Prometheus 텍스트를 내보내는 HTTP 서버를 백그라운드에서 시작"""
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                content = metrics.prometheus().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", f"{len(content)}")
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+METRICS = Metrics()    # 프로세스 전체가 공유
+
+
+#####################################################################################
+# 프로파일링(선택)
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR") or "profile")
+
+
+@contextmanager
+def profile(name: str, enabled: bool = None, out_dir: Path = None) -> Iterator[None]:
+    """cProfile로 구간을 프로파일링해 `{out_dir}/{name}.prof`로 저장(snakeviz, pstats로 확인)
+
+    호출한 스레드만 측정한다. 작업 스레드·프로세스까지 보려면 `py-spy record --subprocesses -- python pipeline.py`.
+
+    Args:
+        name (str): 구간 이름
+        enabled (bool, optional): 실행 여부. Defaults to None(환경 변수 PROFILE이 "1", "all"이거나
+            쉼표로 나열한 이름에 `name`이 있을 때).
+        out_dir (Path, optional): 저장 위치. Defaults to None(환경 변수 PROFILE_DIR, 없으면 ./profile).
+    """
+    if enabled is None:
+        wanted = os.getenv("PROFILE", "")
+        enabled = wanted in ("1", "all") or name in wanted.split(",")
+    if not enabled:
+        yield
+        return
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        out_dir = Path(out_dir or PROFILE_DIR)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(out_dir / f"{name}.prof")
+        logger.info(f"profile saved to {out_dir / f'{name}.prof'}")
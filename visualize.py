@@ -1,16 +1,21 @@
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+import json
+import os
 from pathlib import Path
 import geopandas as gpd
 import matplotlib.pyplot as plt
 import seaborn as sns
 
-from utils.data_utils import OUT_DIR
+from utils.config import OUT_DIR
+from utils.geometry import read_geoframe
 
 OUT7 = OUT_DIR / "geojson.png"
 
 def geojson_to_img():
     sns.set_theme(context="poster", font="Malgun Gothic")
     fig, ax = plt.subplots(figsize=(16, 9), dpi=100)
-    gdf: gpd.GeoDataFrame = gpd.read_file(OUT_DIR / "merge.geojson", encoding="utf-8")
+    gdf: gpd.GeoDataFrame = read_geoframe(OUT_DIR / "merge.geojson")
     
     gdf.plot(column="avg_price", cmap="OrRd", edgecolor="k", legend=True, 
         legend_kwds={"label": "(단위:만원)", "orientation": "vertical"},
@@ -20,5 +25,146 @@ def geojson_to_img():
     fig.set_layout_engine("tight")
     fig.savefig(OUT7)
 
+#####################################################################################
+# 조건별 지도 이미지 일괄 생성
+OUT_MAPS = OUT_DIR / "maps"
+MAP_STYLE = {"cmap": "OrRd", "missing": "lightgrey", "figsize": (16, 9), "dpi": 100, "shared_scale": True}
+
+
+def map_variants(value: str = "면적당금액", stat: str = "mean") -> list[dict]:
+    """전체·계약년월별·면적대별·계약년월×면적대별 지역코드 값(집계 큐브에서 조회)
+
+    Returns:
+        list[dict]: {"name": 파일 이름, "title": 제목, "values": {지역코드: 값}}
+    """
+    from utils.aggregate import AREA_LABELS
+    from utils.cube import OUT_CUBE, TradeCube, build_cube
+
+    if not OUT_CUBE.exists():
+        build_cube()
+    cube = TradeCube()
+    months = cube.cuboid(["계약년월"])["계약년월"].tolist()
+    column = f"{value}_{stat}"
+
+    def _variant(name: str, title: str, **filters) -> dict:
+        df = cube.query(value, stat, by=["지역코드"], **filters)
+        return {"name": name, "title": title, "values": df[column].to_dict()}
+
+    variants = [_variant("all", "전체")]
+    variants += [_variant(f"ym_{ym}", f"{ym[:4]}년 {int(ym[4:])}월", 계약년월=ym) for ym in months]
+    for i, band in enumerate(AREA_LABELS):
+        variants.append(_variant(f"area_{i}", f"전용면적 {band}㎡", 면적대=band))
+        variants += [_variant(f"ym_{ym}_area_{i}", f"{ym[:4]}년 {int(ym[4:])}월 · 전용면적 {band}㎡", 계약년월=ym, 면적대=band) for ym in months]
+    return variants
+
+
+_worker: dict = {}    # 작업 프로세스마다 한 번 만드는 그림·경계
+
+
+def _init_worker(geometry_path: str, key: str, style: dict) -> None:
+    """경계를 한 번 읽어 그린 그림을 만들어 두고, 변형마다 색만 바꿔 저장"""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    sns.set_theme(context="poster", font="Malgun Gothic")
+    gdf = read_geoframe(geometry_path)
+    fig, ax = plt.subplots(figsize=style["figsize"], dpi=style["dpi"])
+    gdf.plot(ax=ax, column=gdf["avg_price"], cmap=style["cmap"], edgecolor="k")
+    collection = ax.collections[0]
+    collection.cmap = plt.get_cmap(style["cmap"]).with_extremes(bad=style["missing"])    # 거래가 없는 지역
+    fig.colorbar(collection, ax=ax, orientation="vertical", label="(단위:만원)")
+    ax.set_axis_off()
+    fig.set_layout_engine("tight")
+    _worker.update(fig=fig, ax=ax, collection=collection, keys=gdf[key].astype(str).tolist())
+
+
+def _render(job: dict) -> str:
+    import numpy as np
+
+    collection = _worker["collection"]
+    values = np.ma.masked_invalid(np.array([job["values"].get(key, np.nan) for key in _worker["keys"]], dtype="float64"))
+    collection.set_array(values)
+    collection.set_clim(*job["clim"])    # 색상 막대도 함께 갱신
+    _worker["ax"].set_title(job["title"])
+    tmp = Path(job["path"]).with_suffix(".tmp.png")
+    _worker["fig"].savefig(tmp)
+    os.replace(tmp, job["path"])
+    return job["path"]
+
+
+def render_maps(
+    variants: list[dict],
+    geometry_path: Path = OUT_DIR / "merge.geojson",
+    out_dir: Path = OUT_MAPS,
+    key: str = "sido_sgg",
+    style: dict = None,
+    workers: int = 1,
+) -> dict[str, list[str]]:
+    """지도 이미지 일괄 생성(경계·값·스타일의 해시가 같은 이미지는 건너뜀)
+
+    작업 프로세스마다 경계를 한 번 읽고 그림·축·색상 막대를 재사용해 색만 바꿔 저장한다.
+
+    Args:
+        variants (list[dict]): `map_variants`의 결과 형식({"name", "title", "values"})
+        geometry_path (Path, optional): 경계. Defaults to merge.geojson.
+        out_dir (Path, optional): 저장 위치({name}.png, manifest.json). Defaults to OUT_MAPS.
+        key (str, optional): `values`의 키와 맞출 경계의 열. Defaults to "sido_sgg".
+        style (dict, optional): MAP_STYLE에 덮어쓸 값. Defaults to None.
+        workers (int, optional): 작업 프로세스 수. Defaults to 1.
+
+    Returns:
+        dict[str, list[str]]: {"rendered": [...], "skipped": [...]} 이미지 이름
+    """
+    style = {**MAP_STYLE, **(style or {})}
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = out_dir / "manifest.json"
+    manifest = json.loads(manifest_path.read_text(encoding="utf-8")) if manifest_path.exists() else {}
+    geometry_hash = hashlib.sha1(Path(geometry_path).read_bytes()).hexdigest()
+
+    finite = [v for variant in variants for v in variant["values"].values() if v == v]
+    shared = (min(finite), max(finite)) if style["shared_scale"] and finite else None    # 변형끼리 같은 색 범위
+
+    jobs, skipped = [], []
+    for variant in variants:
+        values = {f"{key}": float(value) for key, value in variant["values"].items()}
+        local = [v for v in values.values() if v == v] or [0.0, 1.0]
+        clim = shared or (min(local), max(local))
+        payload = json.dumps([geometry_hash, key, style, variant["title"], clim, sorted(values.items())], ensure_ascii=False, default=str)
+        digest = hashlib.sha1(payload.encode()).hexdigest()
+        path = out_dir / f"{variant['name']}.png"
+        if manifest.get(variant["name"]) == digest and path.exists():
+            skipped.append(variant["name"])
+            continue
+        manifest[variant["name"]] = digest
+        jobs.append({"path": str(path), "title": variant["title"], "values": values, "clim": clim})
+
+    if jobs:
+        initargs = (str(geometry_path), key, style)
+        if workers <= 1:
+            # 호출한 프로세스에서 그리므로 백엔드·스타일을 되돌리고 그림을 닫음(앱·대화형 세션에 영향 없도록)
+            import matplotlib
+            backend = matplotlib.get_backend()
+            try:
+                with matplotlib.rc_context():
+                    _init_worker(*initargs)
+                    list(map(_render, jobs))
+            finally:
+                if "fig" in _worker:
+                    plt.close(_worker["fig"])
+                _worker.clear()
+                plt.switch_backend(backend)
+        else:
+            chunksize = max(1, len(jobs) // (workers * 4))
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=initargs) as executor:
+                list(executor.map(_render, jobs, chunksize=chunksize))
+        tmp = manifest_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(manifest, ensure_ascii=False, indent=1), encoding="utf-8")
+        os.replace(tmp, manifest_path)
+    return {"rendered": [Path(job["path"]).stem for job in jobs], "skipped": skipped}
+
+
 if __name__ == "__main__":
-    geojson_to_img()
\ No newline at end of file
+    geojson_to_img()
+    render_maps(map_variants(), workers=os.cpu_count() or 1)
\ No newline at end of file